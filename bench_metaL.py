@@ -0,0 +1,61 @@
+# `Object` graph vs `Store` struct-of-arrays: python3 bench_metaL.py [N..]
+
+import sys, copy, pickle
+from time import perf_counter
+from metaL import *
+
+## files group lines by `WIDTH` under `S` headers
+WIDTH = 10
+
+def build_object(n):
+    root = Sec('bench')
+    for i in range(0, n, WIDTH + 1):
+        group = S(f'group {i}', '}'); root // group
+        for j in range(WIDTH): group // f'line {i + j}'
+    return root
+
+def build_store(n):
+    store = Store(); root = Frame(store, store.node(Sec, 'bench'))
+    for i in range(0, n, WIDTH + 1):
+        group = Frame(store, store.node(S, f'group {i}', '}')); root // group
+        for j in range(WIDTH): group // f'line {i + j}'
+    return root
+
+def index_object(root):
+    ret = {}; stack = [root]
+    while stack:
+        i = stack.pop(); ret.setdefault(i.value, []).append(i)
+        stack.extend(i.nest)
+    return ret
+
+def timeit(f):
+    t = perf_counter(); ret = f()
+    return perf_counter() - t, ret
+
+def row(n, op, obj, store):
+    obj = '-' if obj is None else f'{obj:.3f}s'
+    print(f'{n:>8} {op:<6} object {obj:>9}  store {store:.3f}s')
+
+def bench(n):
+    to = File('bench')
+    t_obj, obj = timeit(lambda: build_object(n))
+    t_sto, sto = timeit(lambda: build_store(n))
+    row(n, 'build', t_obj, t_sto)
+    row(n, 'load', None, timeit(lambda: Store().load(obj))[0])
+    # children as contiguous `echild` ranges for the traversals below
+    row(n, 'pack', None, timeit(lambda: sto.store.pack())[0])
+    # `Object.dump` cycle check is a list scan: O(n^2) on big trees
+    t_obj = timeit(lambda: obj.test())[0] if n <= 20000 else None
+    row(n, 'dump', t_obj, timeit(lambda: sto.test())[0])
+    row(n, 'gen', timeit(lambda: obj.gen(to))[0],
+        timeit(lambda: sto.gen(to))[0])
+    row(n, 'index', timeit(lambda: index_object(obj))[0],
+        timeit(lambda: sto.store.index())[0])
+    row(n, 'copy', timeit(lambda: copy.deepcopy(obj))[0],
+        timeit(lambda: sto.store.copy())[0])
+    row(n, 'pickle', timeit(lambda: pickle.dumps(obj))[0],
+        timeit(lambda: pickle.dumps(sto.store))[0])
+    assert obj.gen(to) == sto.gen(to)
+
+if __name__ == '__main__':
+    for n in map(int, sys.argv[1:] or [100000, 1000000]): bench(n)
@@ -1,7 +1,11 @@
 # generative metaprogramming in Python
 
-import os, sys, re, time
+import os, sys, re, time, string
 import datetime as dt
+import io, gzip, shutil, tarfile, weakref, zipfile
+from abc import ABC, abstractmethod
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 
 ## base object (hyper)graph node = Marvin Minsky's Frame
 class Object:
@@ -72,17 +76,19 @@ class Object:
 
     ## `for i in A`
     def __iter__(self):
-        return iter(self.nest)
+        if self._memo is None: return iter(self.nest)
+        return map(self._fork, self.nest)
 
     ## `A[key]`
     def __getitem__(self, key):
         assert isinstance(key, str)
-        return self.slot[key]
+        if self._memo is None: return self.slot[key]
+        return self.slot[key].cow(self._memo)
 
     ## `A[key] = B`
     def __setitem__(self, key, that):
         assert isinstance(key, str)
-        that = self.box(that)
+        that = self.box(that); self._own()
         self.slot[key] = that; return self
 
     ## `A << B -> A[B.type] = B`
@@ -97,22 +103,22 @@ class Object:
 
     ## `A // B -> A.push(B)`
     def __floordiv__(self, that):
-        that = self.box(that)
+        that = self.box(that); self._own()
         self.nest.append(that); return self
 
     def ins(self, idx, that):
         assert isinstance(idx, int)
-        that = self.box(that)
+        that = self.box(that); self._own()
         self.nest.insert(idx, that); return self
 
     def replace(self, idx, that):
         assert isinstance(idx, int)
-        that = self.box(that)
+        that = self.box(that); self._own()
         self.nest[idx] = that; return self
 
     def before(self, where, that):
         assert isinstance(where, Object)
-        that = self.box(that)
+        that = self.box(that); self._own()
         ret = []
         for i in self.nest:
             if i == where: ret += [that]
@@ -121,14 +127,102 @@ class Object:
 
     def after(self, where, that):
         assert isinstance(where, Object)
-        that = self.box(that)
+        that = self.box(that); self._own()
         ret = []
         for i in self.nest:
             ret += [i]
             if i == where: ret += [that]
         self.nest = ret; return self
 
-    def dropall(self): self.nest = []; return self
+    def dropall(self): self._own(); self.nest = []; return self
+
+    ## @name copy-on-write fork
+
+    ## forks: `{id(template): fork}` shared by the whole forked tree
+    _memo = None
+    ## forks: `slot{}`/`nest[]` still shared with the template
+    _shared = False
+    ## forked templates: read-only, as forks resolve them lazily
+    _frozen = weakref.WeakSet()
+
+    ## `B = A.fork()`: B shares A subtrees, nodes are copied on first touch;
+    ## A is frozen: `nest[]`/`slot{}` edits raise (fork B again instead)
+    def fork(self): self.freeze(); return self.cow({})
+
+    ## mark this graph read-only
+    def freeze(self):
+        stack = [self]
+        while stack:
+            i = stack.pop()
+            if i in Object._frozen: continue
+            Object._frozen.add(i)
+            # shells forked later from a frozen fork are frozen too
+            if i._memo is not None: i._memo['frozen'] = True
+            stack += i.nest; stack += i.slot.values()
+            stack += [j for j in i.__dict__.values() if isinstance(j, Object)]
+
+    ## this node forked into `memo`: a shell sharing `slot{}`/`nest[]`
+    def cow(self, memo):
+        ret = memo.get(id(self))
+        # shared leaves (`_fork`) are cached as is: forked on explicit access
+        if ret is not None and ret is not self: return ret
+        cls = Fork.of(self.__class__); ret = cls.__new__(cls)
+        for k, v in self.__dict__.items():
+            if not isinstance(v, Object): ret.__dict__[k] = v
+        if self._memo is not None:
+            ret.nest = list(self); ret.slot = {k: self[k] for k in self.slot}
+        ret._tpl = self; ret._memo = memo; ret._shared = True
+        prev = memo.get(id(self))
+        if prev is None or prev is self: memo[id(self)] = ret
+        else: ret = prev
+        if 'frozen' in memo: Object._frozen.add(ret)
+        # attributes shadowing class members (`p.test`) never hit __getattr__
+        for k, v in self.__dict__.items():
+            if isinstance(v, Object) and hasattr(self.__class__, k):
+                ret.__dict__[k] = v.cow(memo)
+        return ret
+
+    ## nest[]ed child as seen from this fork: childless `Primitive`s are shared
+    def _fork(self, that):
+        if that._memo is self._memo: return that
+        try: return self._memo[id(that)]
+        except KeyError: pass
+        if isinstance(that, Primitive) and not that.nest and not that.slot \
+                and not any(isinstance(v, Object) for v in that.__dict__.values()):
+            self._memo[id(that)] = that; return that
+        return that.cow(self._memo)
+
+    ## copy shared `slot{}`/`nest[]` before the first write
+    def _own(self):
+        if Object._frozen and self in Object._frozen:
+            raise TypeError(['forked template is read-only', self.head(test=True)])
+        if self._shared:
+            self.nest = list(self)
+            self.slot = {k: self[k] for k in self.slot}
+            self._shared = False
+
+## fork shells: template attributes are resolved (and forked) on first touch;
+## mixed into fork classes only, as `__getattr__` slows every attribute read
+class Fork:
+    def __getattr__(self, key):
+        tpl = self.__dict__.get('_tpl')
+        if tpl is None or key.startswith('__'): raise AttributeError(key)
+        that = getattr(tpl, key)
+        if isinstance(that, Object): that = that.cow(self._memo)
+        self.__dict__[key] = that; return that
+
+    ## `{cls: Fork subclass}`, same class names for `<T:V>` tags
+    classes = {}
+
+    @staticmethod
+    def of(cls):
+        if issubclass(cls, Fork): return cls
+        try: return Fork.classes[cls]
+        except KeyError: pass
+        ret = type(cls)(cls.__name__, (cls, Fork),
+                        {'__module__': cls.__module__,
+                         '__qualname__': cls.__qualname__})
+        return Fork.classes.setdefault(cls, ret)
 
 class Primitive(Object): pass
 
@@ -138,66 +232,689 @@ class S(Primitive):
         self.end = end
         self.pfx = pfx; self.sfx = sfx
 
+    ## lines come from outside the tree: `render` puts their `stream`
+    ## generator into `ret` unconsumed, `File` streams it line by line
+    lazy = False
+
     def gen(self, to, depth=0):
-        ret = ''
+        ret = []; self.render(to, depth, ret); return ''.join(S.chunks(ret))
+
+    ## `render` output as text chunks: plain lines joined, `lazy` generators
+    ## consumed line by line
+    @staticmethod
+    def chunks(ret):
+        try: yield ''.join(ret); return
+        except TypeError: pass
+        text = []
+        for i in ret:
+            if i.__class__ is str: text.append(i); continue
+            if text: yield ''.join(text); text = []
+            yield from i
+        if text: yield ''.join(text)
+
+    ## `stream` fast path: plain trees append lines to `ret` list, nodes with
+    ## own `body` (lazy, reactive) fall back to `stream`
+    def render(self, to, depth, ret):
+        if self.__class__.body is not S.body:
+            if self.lazy: ret.append(self.stream(to, depth))
+            else: ret.extend(self.stream(to, depth))
+            return
+        tab = to.tab * depth; out = ret.append
+        if self.pfx is not None: out(f'{tab}{self.pfx}\n' if self.pfx else '\n')
+        if self.value is not None: out(f'{tab}{self.value}\n')
+        self.nested(to, depth + 1, ret)
+        if self.end is not None: out(f'{tab}{self.end}\n')
+        if self.sfx is not None: out(f'{tab}{self.sfx}\n' if self.sfx else '\n')
+
+    ## nest[]ed at `depth`: bare `S` leaves inline, no call per line
+    def nested(self, to, depth, ret):
+        tab = to.tab * depth; out = ret.append
+        for i in self.nest if self._memo is None else self:
+            if i.__class__ is S and not i.nest and i.pfx is None \
+                    and i.end is None and i.sfx is None:
+                if i.value is not None: out(f'{tab}{i.value}\n')
+            else: i.render(to, depth, ret)
+
+    ## rendered text, line by line
+    def stream(self, to, depth=0):
         if self.pfx is not None:
-            if self.pfx: ret += f'{to.tab*depth}{self.pfx}\n'
-            else: ret += '\n'
-        if self.value is not None:
-            ret += f'{to.tab*depth}{self.value}\n'
-        for i in self: ret += i.gen(to, depth + 1)
+            if self.pfx: yield f'{to.tab*depth}{self.pfx}\n'
+            else: yield '\n'
+        yield from self.body(to, depth)
+        for i in self: yield from i.stream(to, depth + 1)
         if self.end is not None:
-            ret += f'{to.tab*depth}{self.end}\n'
+            yield f'{to.tab*depth}{self.end}\n'
         if self.sfx is not None:
-            if self.sfx: ret += f'{to.tab*depth}{self.sfx}\n'
-            else: ret += '\n'
-        return ret
+            if self.sfx: yield f'{to.tab*depth}{self.sfx}\n'
+            else: yield '\n'
+
+    ## own line(s) between `pfx` and nested
+    def body(self, to, depth=0):
+        if self.value is not None:
+            yield f'{to.tab*depth}{self.value}\n'
 
 class Sec(S):
-    def gen(self, to, depth=0):
-        ret = ''
+    def render(self, to, depth, ret):
+        if not self.nest: return
+        tab = to.tab * depth; out = ret.append
+        if self.pfx is not None: out(f'{tab}{self.pfx}\n' if self.pfx else '\n')
+        if self.value is not None: out(f'{tab}{to.comment} \\ {self.value}\n')
+        self.nested(to, depth, ret)
+        if self.value is not None: out(f'{tab}{to.comment} / {self.value}\n')
+        if self.sfx is not None: out(f'{tab}{self.sfx}\n' if self.sfx else '\n')
+
+    def stream(self, to, depth=0):
         if self:
             if self.pfx is not None:
-                if self.pfx: ret += f'{to.tab*depth}{self.pfx}\n'
-                else: ret += '\n'
+                if self.pfx: yield f'{to.tab*depth}{self.pfx}\n'
+                else: yield '\n'
             if self.value is not None:
-                ret += f'{to.tab*depth}{to.comment} \\ {self.value}\n'
-            for i in self: ret += i.gen(to, depth + 0)
+                yield f'{to.tab*depth}{to.comment} \\ {self.value}\n'
+            for i in self: yield from i.stream(to, depth + 0)
             if self.value is not None:
-                ret += f'{to.tab*depth}{to.comment} / {self.value}\n'
+                yield f'{to.tab*depth}{to.comment} / {self.value}\n'
             if self.sfx is not None:
-                if self.sfx: ret += f'{to.tab*depth}{self.sfx}\n'
-                else: ret += '\n'
+                if self.sfx: yield f'{to.tab*depth}{self.sfx}\n'
+                else: yield '\n'
+
+## lazy lines: `src` iterable (or callable returning one) consumed at `gen`
+class Stream(S):
+    def __init__(self, src, end=None, pfx=None, sfx=None):
+        super().__init__(None, end, pfx, sfx)
+        self.src = src
+
+    lazy = True
+
+    def val(self): return f'{self.src}'
+
+    def lines(self):
+        return self.src() if callable(self.src) else self.src
+
+    def body(self, to, depth=0):
+        for i in self.lines():
+            i = i.rstrip('\n')
+            yield f'{to.tab*depth}{i}\n'
+
+## lazy lines read from `path` file at `gen`
+class Include(Stream):
+    def lines(self):
+        with open(self.src) as F: yield from F
+
+
+## `str.format` plus `{package!p}` conversion: dotted name as `a/b/c` path
+class Formatter(string.Formatter):
+    def convert_field(self, value, conversion):
+        if conversion == 'p': return f'{value}'.replace('.', '/')
+        return super().convert_field(value, conversion)
+
+## reactive line: `template` formatted with `owner` attributes (`{self}` is
+## the owner itself), re-rendered only when the attributes it uses change
+class Fmt(S):
+    def __init__(self, owner, template, end=None, pfx=None, sfx=None):
+        super().__init__(None, end, pfx, sfx)
+        self.owner = owner; self.template = template
+        self.deps = []
+        for _, i, _, _ in string.Formatter().parse(template):
+            if i is None: continue
+            i = re.split(r'[.\[]', i)[0]
+            if i not in self.deps: self.deps.append(i)
+        self.key = None
+
+    def val(self): return self.refresh()
+
+    def refresh(self):
+        V = {i: self.owner if i == 'self' else getattr(self.owner, i)
+             for i in self.deps}
+        key = tuple(self.owner.value if i == 'self' else V[i]
+                    for i in self.deps)
+        if key != self.key:
+            self.value = Fmt.formatter.vformat(self.template, (), V)
+            self.key = key
+        return self.value
+
+    def body(self, to, depth=0):
+        self.refresh(); yield from super().body(to, depth)
+
+    formatter = Formatter()
+
+
+## struct-of-arrays frame store: nodes are `int` ids into parallel arrays
+class Store:
+    def __init__(self):
+        ## per node: type code, interned value, `S` end/pfx/sfx
+        self.kind = array('i'); self.data = array('i')
+        self.ends = array('i'); self.pfxs = array('i'); self.sfxs = array('i')
+        ## nest[]ed: per node edge range head/tail & count
+        self.efirst = array('i'); self.elast = array('i')
+        self.size = array('i')
+        ## nest[]ed edges: child node & next edge
+        self.echild = array('i'); self.enext = array('i')
+        ## slot{}s: per node head -> key/value/next entries
+        self.shead = array('i')
+        self.skey = array('i'); self.sval = array('i'); self.snext = array('i')
+        ## interned type classes & scalar values
+        self.types = []; self.tid = {}
+        self.atoms = []; self.aid = {}
+        ## non-array attributes (rare): `{id: {name: value}}`
+        self.attrs = {}
+        ## every node children are a contiguous `echild` range (after `pack`)
+        self.packed = False
+
+    def __len__(self): return len(self.kind)
+
+    ## @name intern
+
+    def typeid(self, cls):
+        try: return self.tid[cls]
+        except KeyError:
+            self.tid[cls] = len(self.types); self.types.append(cls)
+            return self.tid[cls]
+
+    def intern(self, V):
+        key = (type(V), V)
+        try: return self.aid[key]
+        except KeyError: self.aid[key] = len(self.atoms)
+        except TypeError: pass
+        self.atoms.append(V); return len(self.atoms) - 1
+
+    ## @name node
+
+    def node(self, cls, V=None, end=None, pfx=None, sfx=None):
+        idx = len(self.kind)
+        self.kind.append(self.typeid(cls)); self.data.append(self.intern(V))
+        self.ends.append(self.intern(end))
+        self.pfxs.append(self.intern(pfx)); self.sfxs.append(self.intern(sfx))
+        self.efirst.append(-1); self.elast.append(-1); self.size.append(0)
+        self.shead.append(-1)
+        return idx
+
+    def cls(self, idx): return self.types[self.kind[idx]]
+    def value(self, idx): return self.atoms[self.data[idx]]
+
+    def edge(self, child, nxt=-1):
+        self.packed = False
+        self.echild.append(child); self.enext.append(nxt)
+        return len(self.echild) - 1
+
+    ## `A // B`
+    def push(self, idx, child):
+        e = self.edge(child)
+        if self.elast[idx] < 0: self.efirst[idx] = e
+        else: self.enext[self.elast[idx]] = e
+        self.elast[idx] = e; self.size[idx] += 1
+
+    ## `A.ins(pos, B)` with `list.insert` index rules
+    def ins(self, idx, pos, child):
+        n = self.size[idx]
+        if pos < 0: pos = max(0, n + pos)
+        if pos >= n: return self.push(idx, child)
+        if not pos:
+            self.efirst[idx] = self.edge(child, self.efirst[idx])
+        else:
+            e = self.efirst[idx]
+            for _ in range(pos - 1): e = self.enext[e]
+            self.enext[e] = self.edge(child, self.enext[e])
+        self.size[idx] += 1
+
+    ## nest[]ed node ids: an `echild` slice when packed, else the edge list
+    def kids(self, idx):
+        if self.packed: return self.echild[self.efirst[idx]:self.elast[idx] + 1]
+        return self.edges(idx)
+
+    def edges(self, idx):
+        e = self.efirst[idx]
+        while e >= 0:
+            yield self.echild[e]; e = self.enext[e]
+
+    def setkids(self, idx, kids):
+        self.efirst[idx] = self.elast[idx] = -1; self.size[idx] = 0
+        for i in kids: self.push(idx, i)
+
+    ## `A[key] = B`
+    def set(self, idx, key, child):
+        k = self.intern(key); s = self.shead[idx]
+        while s >= 0:
+            if self.skey[s] == k: self.sval[s] = child; return
+            s = self.snext[s]
+        self.skey.append(k); self.sval.append(child)
+        self.snext.append(self.shead[idx])
+        self.shead[idx] = len(self.skey) - 1
+
+    ## `A[key]`
+    def get(self, idx, key):
+        s = self.shead[idx]
+        while s >= 0:
+            if self.atoms[self.skey[s]] == key: return self.sval[s]
+            s = self.snext[s]
+        raise KeyError(key)
+
+    ## slot{} `(key, id)` pairs, sorted by key
+    def slots(self, idx):
+        ret = []; s = self.shead[idx]
+        while s >= 0:
+            ret.append((self.atoms[self.skey[s]], self.sval[s]))
+            s = self.snext[s]
+        return sorted(ret)
+
+    ## @name convert
+
+    ## `Object` (sub)graph -> node id
+    def load(self, obj, memo=None):
+        if memo is None: memo = {}
+        if id(obj) in memo: return memo[id(obj)]
+        if isinstance(obj, S):
+            idx = self.node(obj.__class__, obj.value, obj.end, obj.pfx, obj.sfx)
+        else:
+            idx = self.node(obj.__class__, obj.value)
+        memo[id(obj)] = idx
+        extra = {k: v for k, v in obj.__dict__.items()
+                 if k not in Store.FIELDS}
+        if extra: self.attrs[idx] = extra
+        for k in obj.keys(): self.set(idx, k, self.load(obj[k], memo))
+        for i in obj: self.push(idx, self.load(i, memo))
+        return idx
+
+    FIELDS = ('type', 'value', 'slot', 'nest', 'end', 'pfx', 'sfx')
+
+    ## node id -> `Object` (sub)graph
+    def thaw(self, idx, memo=None):
+        if memo is None: memo = {}
+        if idx in memo: return memo[idx]
+        obj = memo[idx] = self.shell(idx)
+        for k, v in self.slots(idx): obj.slot[k] = self.thaw(v, memo)
+        for i in self.kids(idx): obj.nest.append(self.thaw(i, memo))
+        return obj
+
+    ## node id -> single `Object`, empty slot{} & nest[]
+    def shell(self, idx):
+        cls = self.cls(idx)
+        obj = cls.__new__(cls)
+        obj.type = obj.tag(); obj.value = self.value(idx)
+        obj.slot = {}; obj.nest = []
+        if issubclass(cls, S):
+            obj.end = self.atoms[self.ends[idx]]
+            obj.pfx = self.atoms[self.pfxs[idx]]
+            obj.sfx = self.atoms[self.sfxs[idx]]
+        obj.__dict__.update(self.attrs.get(idx, {}))
+        return obj
+
+    ## relayout nest[]ed edges so every node children are a contiguous range
+    def pack(self):
+        echild = array('i'); enext = array('i')
+        for idx in range(len(self)):
+            kids = list(self.edges(idx))
+            if kids:
+                self.efirst[idx] = len(echild)
+                self.elast[idx] = len(echild) + len(kids) - 1
+                echild.extend(kids)
+                enext.extend(range(len(echild) - len(kids) + 1, len(echild)))
+                enext.append(-1)
+        self.echild = echild; self.enext = enext; self.packed = True
+        return self
+
+    def copy(self):
+        ret = Store()
+        for k, v in self.__dict__.items():
+            if isinstance(v, dict): v = v.copy()
+            elif isinstance(v, (array, list)): v = v[:]
+            setattr(ret, k, v)
         return ret
 
+    ## @name traversal
+
+    ## same text as `Object.dump()`, walking arrays with an explicit stack
+    def dump(self, idx=0, test=False):
+        ret = []; seen = set()
+        stack = [(idx, 0, '')]
+        while stack:
+            idx, depth, prefix = stack.pop()
+            ret.append('\n' + '\t' * depth + self.head(idx, prefix, test))
+            if idx in seen: ret.append(' _/'); continue
+            seen.add(idx)
+            nest = [(i, depth + 1, f'{j}: ')
+                    for j, i in enumerate(self.kids(idx))]
+            slot = [(i, depth + 1, f'{k} = ') for k, i in self.slots(idx)]
+            stack.extend(reversed(slot + nest))
+        return ''.join(ret)
+
+    def head(self, idx, prefix='', test=False):
+        cls = self.cls(idx)
+        if cls.val is Object.val: val = self.value(idx)
+        else: val = self.shell(idx).val()
+        gid = '' if test else f' @{idx:x}'
+        return f'{prefix}<{cls.__name__.lower()}:{val}>{gid}'
+
+    ## plain `S`/`Sec` node text around its nested: `(head, step, tail)`,
+    ## `None` for other classes (rendered through `thaw`)
+    def frame(self, idx, to, depth):
+        cls = self.cls(idx); tab = to.tab * depth
+        if cls.stream is Sec.stream:
+            if not self.size[idx]: return '', 0, ''
+            head = f'{to.comment} \\ '; tail = f'{to.comment} / '; step = 0
+        elif cls.stream is S.stream and cls.body is S.body:
+            head = tail = ''; step = 1
+        else: return None
+        pfx = self.atoms[self.pfxs[idx]]
+        V = self.atoms[self.data[idx]]
+        end = self.atoms[self.ends[idx]] if step else None
+        sfx = self.atoms[self.sfxs[idx]]
+        pre = ''; post = ''
+        if pfx is not None: pre += f'{tab}{pfx}\n' if pfx else '\n'
+        if V is not None: pre += f'{tab}{head}{V}\n'
+        if end is not None: post += f'{tab}{end}\n'
+        if tail and V is not None: post += f'{tab}{tail}{V}\n'
+        if sfx is not None: post += f'{tab}{sfx}\n' if sfx else '\n'
+        return pre, step, post
+
+    ## same text as `S.stream()` for plain `S`/`Sec` nodes
+    def stream(self, idx, to, depth=0):
+        frame = self.frame(idx, to, depth)
+        if frame is None:
+            yield from self.thaw(idx).stream(to, depth); return
+        pre, step, post = frame
+        if pre: yield pre
+        for i in self.kids(idx): yield from self.stream(i, to, depth + step)
+        if post: yield post
+
+    ## `stream` fast path: lines appended to `ret` list, no nested generators;
+    ## bare `S` leaves (value only) are rendered inline by their parent
+    def render(self, idx, to, depth, ret):
+        out = ret.append; kids = self.kids
+        atoms = self.atoms; data = self.data; size = self.size
+        ends = self.ends; pfxs = self.pfxs; sfxs = self.sfxs
+        # per type code: 1 = `S`, 0 = `Sec`, None = rendered via `thaw`
+        step = [1 if c.stream is S.stream and c.body is S.body else
+                0 if c.stream is Sec.stream else None for c in self.types]
+        leaf = [i == 1 for i in step]; kind = self.kind
+        none = self.intern(None); tabs = [to.tab * i for i in range(depth + 2)]
+
+        def walk(idx, depth):
+            if step[kind[idx]] is None:
+                return self.thaw(idx).render(to, depth, ret)
+            pre, dive, post = self.frame(idx, to, depth)
+            if pre: out(pre)
+            depth += dive
+            if depth >= len(tabs): tabs.append(to.tab * depth)
+            tab = tabs[depth]
+            for i in kids(idx):
+                if leaf[kind[i]] and not size[i] and ends[i] == none \
+                        and pfxs[i] == none and sfxs[i] == none:
+                    V = atoms[data[i]]
+                    if V is not None: out(f'{tab}{V}\n')
+                else: walk(i, depth)
+            if post: out(post)
+        walk(idx, depth)
+
+    def gen(self, idx, to, depth=0):
+        ret = []; self.render(idx, to, depth, ret)
+        return ''.join(S.chunks(ret))
+
+    ## `{value: [ids]}` in a single pass over the `data` array
+    def index(self):
+        ret = {}
+        for idx, v in enumerate(self.data):
+            ret.setdefault(v, []).append(idx)
+        return {self.atoms[k]: v for k, v in ret.items()}
+
+## `Object` operator API over a single `Store` node
+class Frame:
+    __slots__ = ('store', 'id')
+
+    def __init__(self, store, idx):
+        self.store = store; self.id = idx
+
+    def box(self, that):
+        if isinstance(that, Frame):
+            assert that.store is self.store; return that.id
+        if isinstance(that, Object): return self.store.load(that)
+        if isinstance(that, str): return self.store.node(S, that)
+        raise TypeError(['box', type(that), that])
+
+    def __eq__(self, that):
+        return isinstance(that, Frame) and \
+            that.store is self.store and that.id == self.id
+
+    def __hash__(self): return hash((id(self.store), self.id))
+
+    ## @name text tree dump
+
+    def __repr__(self): return self.dump(test=False)
+    def test(self): return self.dump(test=True)
+    def dump(self, test=False): return self.store.dump(self.id, test)
+    def head(self, prefix='', test=False):
+        return self.store.head(self.id, prefix, test)
+
+    def tag(self): return self.store.cls(self.id).__name__.lower()
+    def val(self): return f'{self.value}'
+
+    @property
+    def type(self): return self.tag()
+    @property
+    def value(self): return self.store.value(self.id)
+
+    ## @name operator
+
+    def keys(self): return [k for k, v in self.store.slots(self.id)]
+    def __len__(self): return self.store.size[self.id]
+
+    def __iter__(self):
+        return (Frame(self.store, i) for i in self.store.kids(self.id))
+
+    def __getitem__(self, key):
+        assert isinstance(key, str)
+        return Frame(self.store, self.store.get(self.id, key))
+
+    def __setitem__(self, key, that):
+        assert isinstance(key, str)
+        self.store.set(self.id, key, self.box(that)); return self
+
+    def __lshift__(self, that):
+        that = Frame(self.store, self.box(that))
+        return self.__setitem__(that.tag(), that)
+
+    def __rshift__(self, that):
+        that = Frame(self.store, self.box(that))
+        return self.__setitem__(that.val(), that)
+
+    def __floordiv__(self, that):
+        self.store.push(self.id, self.box(that)); return self
+
+    def ins(self, idx, that):
+        assert isinstance(idx, int)
+        self.store.ins(self.id, idx, self.box(that)); return self
+
+    def replace(self, idx, that):
+        assert isinstance(idx, int)
+        kids = list(self.store.kids(self.id)); kids[idx] = self.box(that)
+        self.store.setkids(self.id, kids); return self
+
+    def before(self, where, that):
+        assert isinstance(where, Frame)
+        that = self.box(that); ret = []
+        for i in self.store.kids(self.id):
+            if i == where.id: ret += [that]
+            ret += [i]
+        self.store.setkids(self.id, ret); return self
+
+    def after(self, where, that):
+        assert isinstance(where, Frame)
+        that = self.box(that); ret = []
+        for i in self.store.kids(self.id):
+            ret += [i]
+            if i == where.id: ret += [that]
+        self.store.setkids(self.id, ret); return self
+
+    def dropall(self): self.store.setkids(self.id, []); return self
+
+    ## @name codegen
+
+    def stream(self, to, depth=0): return self.store.stream(self.id, to, depth)
+    def render(self, to, depth, ret): self.store.render(self.id, to, depth, ret)
+    def gen(self, to, depth=0): return self.store.gen(self.id, to, depth)
+
+    def thaw(self): return self.store.thaw(self.id)
+
+
+## sync backend: where `Dir`/`File` trees are written to
+class FS(Object, ABC):
+    def __init__(self, V=''):
+        super().__init__(V)
+
+    @abstractmethod
+    def mkdir(self, path): pass
+    ## text file from `chunks` strings
+    @abstractmethod
+    def write(self, path, chunks): pass
+    ## binary `src` file from disk into `path`
+    @abstractmethod
+    def copy(self, path, src): pass
+
+    def close(self): pass
+
+## real disk backend (default)
+class Disk(FS):
+    def mkdir(self, path):
+        try: os.mkdir(path)
+        except FileExistsError: pass
+
+    def write(self, path, chunks):
+        with open(path, 'w') as F:
+            for i in chunks: F.write(i)
+
+    def copy(self, path, src): shutil.copyfile(src, path)
+
+## in-memory backend for dry runs & tests: `.tree = {path: bytes}`
+class Mem(FS):
+    def __init__(self, V='mem'):
+        super().__init__(V)
+        self.dirs = set(); self.tree = {}
+
+    def mkdir(self, path): self.dirs.add(path)
+
+    def write(self, path, chunks):
+        self.tree[path] = ''.join(chunks).encode()
+
+    def copy(self, path, src):
+        with open(src, 'rb') as F: self.tree[path] = F.read()
+
+## reproducible `.zip`, entries streamed one by one
+class Zip(FS):
+    ## fixed timestamp (zip epoch) for reproducible archives
+    DATE = (1980, 1, 1, 0, 0, 0)
 
-class IO(Object):
     def __init__(self, V):
         super().__init__(V)
-        self.path = V
+        self.zip = zipfile.ZipFile(V, 'w', zipfile.ZIP_DEFLATED)
+        ## entries made: sibling `a/b`, `a/c` dirs both make `a`
+        self.dirs = set()
+
+    def info(self, path, mode):
+        ret = zipfile.ZipInfo(path, Zip.DATE)
+        ret.compress_type = zipfile.ZIP_DEFLATED
+        ret.create_system = 3; ret.external_attr = mode << 16
+        return ret
+
+    def mkdir(self, path):
+        if path in self.dirs: return
+        self.dirs.add(path)
+        self.zip.writestr(self.info(f'{path}/', 0o40755), b'')
+
+    def write(self, path, chunks):
+        with self.zip.open(self.info(path, 0o100644), 'w') as F:
+            for i in chunks: F.write(i.encode())
+
+    def copy(self, path, src):
+        with open(src, 'rb') as S, \
+                self.zip.open(self.info(path, 0o100644), 'w') as F:
+            shutil.copyfileobj(S, F)
+
+    def close(self): self.zip.close()
+
+## reproducible `.tar.gz` in a single stream
+class Tar(FS):
+    def __init__(self, V):
+        super().__init__(V)
+        # no file name & time in gzip header
+        self.raw = open(V, 'wb')
+        self.gz = gzip.GzipFile('', 'wb', fileobj=self.raw, mtime=0)
+        self.tar = tarfile.open(fileobj=self.gz, mode='w|',
+                                format=tarfile.GNU_FORMAT)
+        self.dirs = set()
+
+    def info(self, path, size=0, mode=0o644, type=tarfile.REGTYPE):
+        ret = tarfile.TarInfo(path)
+        ret.size = size; ret.mode = mode; ret.type = type; ret.mtime = 0
+        ret.uid = ret.gid = 0; ret.uname = ret.gname = ''
+        return ret
+
+    def mkdir(self, path):
+        if path in self.dirs: return
+        self.dirs.add(path)
+        self.tar.addfile(self.info(path, mode=0o755, type=tarfile.DIRTYPE))
+
+    ## tar headers carry the size: one file (not the tree) is rendered at once
+    def write(self, path, chunks):
+        data = ''.join(chunks).encode()
+        self.tar.addfile(self.info(path, len(data)), io.BytesIO(data))
+
+    def copy(self, path, src):
+        with open(src, 'rb') as F:
+            self.tar.addfile(self.info(path, os.fstat(F.fileno()).st_size), F)
+
+    def close(self): self.tar.close(); self.gz.close(); self.raw.close()
+
+## `V` name: plain string or `Fmt` following owner attributes (`{self}`,
+## `{package!p}`); full paths are joined at `sync` from the parent `Dir`s
+class IO(Object):
+    def name(self):
+        if isinstance(self.value, Fmt): return self.value.refresh()
+        return self.value
+
+    def val(self): return self.name()
+
+    def join(self, root):
+        return f'{root}/{self.name()}' if root else self.name()
 
 class Dir(IO):
-    def sync(self):
-        try: os.mkdir(self.path)
-        except FileExistsError: pass
-        for i in self: i.sync()
+    ## `a/b` names make every level; children are merged by name as on disk
+    ## for every backend: same-named `Dir`s (`merge`) share one directory,
+    ## the last same-named `File` wins (nodes added twice go in once)
+    def sync(self, fs=None, root='', merge=()):
+        if fs is None: fs = Disk()
+        path = root
+        for i in self.name().split('/'):
+            path = f'{path}/{i}' if path else i; fs.mkdir(path)
+        kids = {}
+        for d in (self, *merge):
+            for i in d:
+                if isinstance(i, Dir): kids.setdefault(i.name(), []).append(i)
+                else: kids[i.name()] = i
+        for i in kids.values():
+            if isinstance(i, list): i[0].sync(fs, path, i[1:])
+            else: i.sync(fs, path)
 
     def __floordiv__(self, F):
         assert isinstance(F, IO)
-        F.path = f'{self.path}/{F.path}'
         return super().__floordiv__(F)
 
 class File(IO):
     def __init__(self, V, ext='', tab='\t', comment='#'):
-        super().__init__(V + ext)
+        super().__init__(V)
+        self.ext = ext
         self.tab = tab; self.comment = comment
         self.top = Sec(); self.bot = Sec()
 
-    def sync(self):
-        with open(self.path, 'w') as F:
-            F.write(self.top.gen(self))
-            for i in self: F.write(i.gen(self))
-            F.write(self.bot.gen(self))
+    def name(self): return f'{super().name()}{self.ext}'
+
+    def sync(self, fs=None, root=''):
+        if fs is None: fs = Disk()
+        fs.write(self.join(root), self.stream())
+
+    ## rendered file content: one chunk per top-level node, `lazy` nodes at
+    ## any depth line by line
+    def stream(self):
+        for i in (self.top, *self, self.bot):
+            ret = []; i.render(self, 0, ret); yield from S.chunks(ret)
 
 class giti(File):
     def __init__(self, V='', ext='.gitignore'):
@@ -207,9 +924,15 @@ class giti(File):
 class Meta(Object): pass
 
 class Module(Meta):
+    ## reactive `Fmt` line over this module attributes
+    def fmt(self, template, end=None, pfx=None, sfx=None):
+        return Fmt(self, template, end, pfx, sfx)
+
     def __format__(self, spec):
         if not spec: return f'{self.value}'
         if spec == 'l': return f'{self.value.lower()}'
+        # Rust crate: `my-proj` package is `my_proj` in `use` paths
+        if spec == 'c': return f'{self.value.lower().replace("-", "_")}'
         raise TypeError(['__format__', spec])
 
 class mkFile(File):
@@ -224,7 +947,7 @@ class Project(Module):
     def __init__(self, V=None):
         if V is None: V = os.getcwd().split('/')[-1]
         super().__init__(V)
-        self.d = Dir(f'{self}')
+        self.d = Dir(self.fmt('{self}'))
         self.d_dirs()
         self.vs_code()
         self.f_giti()
@@ -248,19 +971,17 @@ class Project(Module):
         self.ABOUT = ''
         #
         self.readme = File('README', '.md'); self.d // self.readme
-        self.sync_readme()
-
-    def sync_readme(self):
-        self.readme.dropall() \
-            // f'# ![logo](doc/logo.png) `{self.MODULE}`' \
-            // f'## {self.TITLE}' // '' \
-            // f'(c) {self.AUTHOR} <<{self.EMAIL}>> {self.YEAR} {self.LICENSE}' // '' \
-            // f'github: {self.GITHUB}/{self}' // '' \
-            // self.ABOUT
+        self.readme \
+            // self.fmt('# ![logo](doc/logo.png) `{MODULE}`') \
+            // self.fmt('## {TITLE}') // '' \
+            // self.fmt('(c) {AUTHOR} <<{EMAIL}>> {YEAR} {LICENSE}') // '' \
+            // self.fmt('github: {GITHUB}/{self}') // '' \
+            // self.fmt('{ABOUT}')
 
     def f_mk(self):
         self.mk = mkFile(); self.d // self.mk
         self.mk_var()
+        self.mk_fn()
         self.mk_dir()
         self.mk_tool()
         self.mk_src()
@@ -277,7 +998,7 @@ class Project(Module):
             // '# detect module/project name by current directory' \
             // f'{"MODULE":<7} = $(notdir $(CURDIR))' \
             // '# detect OS name (only Linux/MinGW)' \
-            // f'{"OS":<7} = $(shell uname -s)' \
+            // f'{"OS":<7} = $(if $(findstring linux,$(MAKE_HOST)),Linux,$(shell uname -s))' \
             // '# current date in the `ddmmyy` format' \
             // f'{"NOW":<7} = $(shell date +%d%m%y)' \
             // '# release hash: four hex digits (for snapshots)' \
@@ -285,7 +1006,16 @@ class Project(Module):
             // '# current git branch' \
             // f'{"BRANCH":<7} = $(shell git rev-parse --abbrev-ref HEAD)' \
             // '# number of CPU cores (for parallel builds)' \
-            // f'{"CORES":<7} = $(shell grep processor /proc/cpuinfo| wc -l)'
+            // f'{"CORES":<7} = $(words $(filter processor,$(file < /proc/cpuinfo)))'
+
+    def mk_fn(self):
+        self.mk.fn = Sec('fn', pfx=''); self.mk // self.mk.fn
+        self.mk.fn \
+            // '# pure make helpers: no $(shell) forks on every make run' \
+            // f'{"empty":<7} =' \
+            // f'{"space":<7} = $(empty) $(empty)' \
+            // '# recursive wildcard: $(call rwildcard,src,*.java)' \
+            // 'rwildcard = $(foreach d,$(wildcard $(1:=/*)),$(call rwildcard,$d,$2) $(filter $(subst *,%,$2),$d))'
 
     def mk_dir(self):
         self.mk.dir_ = Sec('dir', pfx=''); self.mk // self.mk.dir_
@@ -325,6 +1055,10 @@ class Project(Module):
         self.mk.test = S('test:', pfx='.PHONY: test')
         self.mk.test_ // self.mk.test
         #
+        self.mk.bench_ = Sec('bench', pfx=''); self.mk.all_ // self.mk.bench_
+        self.mk.bench = S('bench:', pfx='.PHONY: bench')
+        self.mk.bench_ // self.mk.bench
+        #
         self.mk.format_ = Sec(
             'format', pfx=''); self.mk.all_ // self.mk.format_
         self.mk.format = S('tmp/format:',
@@ -352,7 +1086,7 @@ class Project(Module):
                            pfx='\n.PHONY: Linux_install Linux_update'))
         self.mk.install_ // self.mk.linux
         self.mk.install_ \
-            // (S('ifneq (,$(shell which apt))', 'endif')
+            // (S('ifneq (,$(wildcard /usr/bin/apt))', 'endif')
                 // 'sudo apt update'
                 // 'sudo apt install -u `cat apt.txt apt.dev`')
 
@@ -513,11 +1247,36 @@ class Project(Module):
         self.giti = giti(); self.d // self.giti
         self.giti \
             // '*~' // '*.swp' // '*.log' // '' \
-            // '/docs/' // f'/{self}/' // ''
-
-    def sync(self):
-        self.sync_readme()
-        self.d.sync()
+            // '/docs/' // self.fmt('/{self}/') // ''
+
+    def sync(self, fs=None):
+        self.d.sync(fs)
+
+    ## release archive (`.zip` or `.tar.gz`/`.tgz`) in one pass straight from
+    ## the rendered tree, plus `bins` files from disk (`lib/*.jar`, ...)
+    def archive(self, path, bins=()):
+        if path.endswith(('.tar.gz', '.tgz')): fs = Tar(path)
+        else: fs = Zip(path)
+        try:
+            self.d.sync(fs)
+            for i in sorted(bins): fs.copy(f'{self.d.name()}/{i}', i)
+        except BaseException:
+            # no partial archive left behind (missing `bins` file, ...)
+            try: fs.close()
+            finally: os.remove(path)
+            raise
+        fs.close()
+        return path
+
+    ## copy-on-write project clone, optionally renamed to `V`: paths & lines
+    ## built with `fmt` follow the new name; this project becomes read-only
+    def fork(self, V=None):
+        ret = super().fork()
+        if V is not None:
+            for i in ('MODULE', 'TITLE'):
+                if getattr(self, i) == f'{self}': setattr(ret, i, V)
+            ret.value = V
+        return ret
 
     def __or__(self, mod):
         assert isinstance(mod, Mod)
@@ -528,15 +1287,66 @@ class Mod(Module):
     def __init__(self):
         super().__init__('mod')
 
+    HOOKS = ('f_giti', 'f_mk', 'f_apt', 'f_src', 'f_test', 'vs_code')
+
+    ## `hook: (reads, writes)` project regions (`p` attribute names) touched
+    ## by hooks this class defines; undeclared overrides count as `*` = all.
+    ## Hooks are grouped into waves of non-clashing ones, but waves only run
+    ## concurrently with `workers > 0`: by default they are just an order
+    regions = {}
+
+    ## worker threads for non-conflicting hooks, `0` = strictly serial
+    ## (default): threads share the GIL, so they only pay off for hooks
+    ## blocking outside Python (I/O, subprocesses), not for tree building
+    ## -- no shipped hook does that, none of them sets `workers`
+    workers = 0
+    ## `{workers: ThreadPoolExecutor}` shared by all mods of the same size
+    pools = {}
+
     def pipe(self, p):
-        self.f_giti(p)
-        self.f_mk(p)
-        self.f_apt(p)
-        self.f_src(p)
-        self.f_test(p)
-        self.vs_code(p)
+        self.run(p, *Mod.HOOKS)
         return p
 
+    ## `(reads, writes)` sets of `hook` merged over the class hierarchy
+    def region(self, hook):
+        r = set(); w = set()
+        for cls in self.__class__.__mro__:
+            if hook in cls.__dict__.get('regions', {}):
+                cr, cw = cls.regions[hook]
+                r |= set(cr.split()); w |= set(cw.split())
+            elif hook in cls.__dict__ and cls is not Mod:
+                w.add('*')
+        return r, w
+
+    @staticmethod
+    def clash(a, b):
+        (ra, wa), (rb, wb) = a, b
+        if '*' in wa | wb: return True
+        if '*' in ra and wb or '*' in rb and wa: return True
+        return bool(wa & (rb | wb) or wb & ra)
+
+    ## apply `hooks` to `p`: each runs in the wave after the last earlier hook
+    ## it clashes with, so conflicting hooks keep their serial order
+    def run(self, p, *hooks):
+        regs = [self.region(i) for i in hooks]
+        level = []; waves = []
+        for i, reg in enumerate(regs):
+            lvl = max([level[j] + 1 for j in range(i)
+                       if Mod.clash(regs[j], reg)], default=0)
+            level.append(lvl)
+            if lvl == len(waves): waves.append([])
+            waves[lvl].append(hooks[i])
+        for wave in waves:
+            if len(wave) == 1 or not self.workers:
+                for i in wave: getattr(self, i)(p)
+            else:
+                pool = Mod.pools.get(self.workers)
+                if pool is None:
+                    pool = Mod.pools[self.workers] = \
+                        ThreadPoolExecutor(self.workers)
+                jobs = [pool.submit(getattr(self, i), p) for i in wave]
+                for i in jobs: i.result()
+
     def f_giti(self, p): pass
     def f_mk(self, p): pass
     def f_apt(self, p): pass
@@ -550,6 +1360,10 @@ class pyFile(File):
         self.top // 'import config' // ''
 
 class Python(Mod):
+    regions = {'f_giti': ('', 'giti'), 'f_mk': ('', 'mk vscode'),
+               'f_apt': ('', 'apt'), 'f_src': ('', 'd config py'),
+               'f_test': ('', 'd test py_bench'), 'vs_code': ('', 'vscode')}
+
     def pipe(self, p):
         p = super().pipe(p)
         self.f_src(p)
@@ -569,16 +1383,43 @@ class Python(Mod):
         self.p_py(p)
 
     def p_py(self, p):
-        p.py = pyFile(f'{p}'); p.d // p.py
+        p.py = pyFile(p.fmt('{self}')); p.d // p.py
         p.py // self.p_mods()
 
     def f_test(self, p):
         super().f_test(p)
-        p.test = pyFile(f'test_{p}'); p.d // p.test
+        p.test = pyFile(p.fmt('test_{self}')); p.d // p.test
         p.test \
-            // 'import pytest' // f'from {p} import *' // ''
+            // 'import pytest' // p.fmt('from {self} import *') // ''
         p.test \
             // 'def test_any(): assert True'
+        self.p_bench(p)
+
+    def p_bench(self, p):
+        p.py_bench = pyFile(p.fmt('bench_{self}')); p.d // p.py_bench
+        p.py_bench \
+            // 'import json, sys, timeit' \
+            // 'from time import perf_counter' \
+            // p.fmt('from {self} import *') // ''
+        p.py_bench.cases = Sec()
+        p.py_bench \
+            // '## `name: callable` micro benchmarks' \
+            // (S('BENCH = {', '}') // (p.py_bench.cases // "'noop': lambda: None,"))
+        p.py_bench \
+            // (S('def bench(f, repeat=5):', pfx='')
+                // 'timer = timeit.Timer(f, timer=perf_counter)'
+                // 'number, _ = timer.autorange()'
+                // 'times = [i / number for i in timer.repeat(repeat, number)]'
+                // (S("return {'number': number, 'repeat': repeat,")
+                    // "'min': min(times), 'max': max(times),"
+                    // "'mean': sum(times) / len(times), 'ops': 1 / min(times)}"))
+        p.py_bench \
+            // (S("if __name__ == '__main__':", pfx='')
+                // 'ret = {k: bench(f) for k, f in BENCH.items()}'
+                // (S('if sys.argv[1:]:')
+                    // (S("with open(sys.argv[1], 'w') as F:")
+                        // 'json.dump(ret, F, indent=2)'))
+                // 'json.dump(ret, sys.stdout, indent=2); print()')
 
     def f_giti(self, p):
         p.giti // (Sec('py', sfx='')
@@ -610,7 +1451,7 @@ class Python(Mod):
         super().f_mk(p)
         p.mk.src \
             // 'P += config.py' \
-            // 'Y += $(MODULE).py test_$(MODULE).py'
+            // 'Y += $(MODULE).py test_$(MODULE).py bench_$(MODULE).py'
         p.mk.src.s // 'S += $(Y)'
         #
         p.mk.all.value += ' $(PY) $(MODULE).py'
@@ -620,6 +1461,8 @@ class Python(Mod):
         p.mk.test_py = (S('test_py: $(PYT) test_$(MODULE).py', pfx='') // '$^')
         p.mk.test_ // p.mk.test_py
         #
+        self.mk_perf(p)
+        #
         p.mk.format_py = (S('tmp/format_py: $(Y)', pfx=''))
         p.mk.format_ // p.mk.format_py
         p.mk.format.value += ' tmp/format_py'
@@ -640,6 +1483,28 @@ class Python(Mod):
         #
         p.mk.merge // 'MERGE += requirements.txt $(Y)'
 
+    def mk_perf(self, p):
+        p.mk.bench.value += ' bench_py'
+        p.mk.bench_py = (S('bench_py: $(PY) bench_$(MODULE).py', pfx='')
+                         // '$^ tmp/bench_$(MODULE).json')
+        p.mk.bench_ // p.mk.bench_py
+        #
+        p.mk.perf = Sec('perf', pfx=''); p.mk.all_ // p.mk.perf
+        p.mk.perf \
+            // '.PHONY: profile importtime' \
+            // (S('profile: $(PY) $(MODULE).py')
+                // '$(PY) -m cProfile -o tmp/$(MODULE).prof $(MODULE).py'
+                // ('$(PY) -c "import pstats; pstats.Stats(\'tmp/$(MODULE).prof\')'
+                    '.sort_stats(\'cumulative\').print_stats(50)"'
+                    ' > tmp/profile_$(MODULE).txt')) \
+            // (S('importtime: $(PY) $(MODULE).py')
+                // ('$(PY) -X importtime -c "import $(MODULE)"'
+                    ' 2> tmp/importtime_$(MODULE).txt'))
+        p.vscode.tasks \
+            // p.task('py', 'bench_py') \
+            // p.task('py', 'profile') \
+            // p.task('py', 'importtime')
+
 
 class rsFile(File):
     def __init__(self, V, ext='.rs', tab=' ' * 4, comment='//'):
@@ -650,6 +1515,10 @@ class tomlFile(File):
         super().__init__(V, ext, tab, comment)
 
 class Rust(Mod):
+    regions = {'f_giti': ('', 'giti'), 'f_mk': ('', 'mk'),
+               'f_src': ('AUTHOR EMAIL', 'd cargo src rs rs_lib benches rs_bench'),
+               'f_test': ('rs', 'src')}
+
     def pipe(self, p):
         p = super().pipe(p)
         return p
@@ -668,7 +1537,8 @@ class Rust(Mod):
             // f'{"CARGO":<7} = $(CAR)/cargo' \
             // f'{"RUSTC":<7} = $(CAR)/rustc'
         #
-        p.mk.src // 'R += $(shell find src -type f -regex ".+.rs$$")'
+        p.mk.src // 'R += $(call rwildcard,src,*.rs)'
+        p.mk.src // 'R += $(call rwildcard,benches,*.rs)'
         p.mk.src.s // 'S += $(R)'
         p.mk.all.value = 'all: Cargo.toml $(R)'
         p.mk.all.dropall() \
@@ -681,6 +1551,12 @@ class Rust(Mod):
                 // '$(CARGO) test')
         p.mk.test_ // p.mk.test_rs
         #
+        p.mk.bench.value += ' bench_rs'
+        p.mk.bench_rs = \
+            (S('bench_rs: Cargo.toml $(R)', pfx='')
+                // '$(CARGO) bench')
+        p.mk.bench_ // p.mk.bench_rs
+        #
         p.mk.format_rs = (S('tmp/format_rs: $(Y)', pfx=''))
         p.mk.format_ // p.mk.format_rs
         p.mk.format.value += ' tmp/format_rs'
@@ -699,8 +1575,19 @@ class Rust(Mod):
     def f_src(self, p):
         super().f_src(p)
         self.f_cargo(p)
+        self.f_lib(p)
         self.f_main(p)
         self.f_test(p)
+        self.f_bench(p)
+
+    ## library crate: code `main.rs`, tests & benches share
+    def f_lib(self, p):
+        p.rs_lib = rsFile('lib'); p.src // p.rs_lib
+        p.rs_lib // '//! library crate: shared by `main.rs`, tests & `benches/`'
+        p.rs_lib \
+            // (S('pub fn sum(n: u64) -> u64 {', '}',
+                 pfx='\n/// sum of `0..n`: sample workload for `benches/bench.rs`')
+                // '(0..n).sum()')
 
     def f_main(self, p):
         p.rs = rsFile('main'); p.src // p.rs
@@ -736,13 +1623,60 @@ class Rust(Mod):
             // '#[test]' \
             // (S('fn any() {', '}') // 'assert!(true);')
 
+    def f_bench(self, p):
+        p.benches = Dir('benches'); p.d // p.benches
+        p.rs_bench = rsFile('bench'); p.benches // p.rs_bench
+        p.rs_bench // '// std-only benchmark harness: `harness = false` in Cargo.toml'
+        #
+        p.rs_bench.use = Sec('use', pfx=''); p.rs_bench // p.rs_bench.use
+        p.rs_bench.use \
+            // 'use std::hint::black_box;' \
+            // 'use std::time::{Duration, Instant};' \
+            // p.fmt('use {self:c}::sum;')
+        #
+        p.rs_bench \
+            // S('const WARMUP: Duration = Duration::from_millis(200);', pfx='') \
+            // 'const BATCH: Duration = Duration::from_millis(5);' \
+            // 'const SAMPLES: usize = 50;'
+        #
+        p.rs_bench \
+            // (S('fn bench<F: FnMut()>(name: &str, mut f: F) {', '}',
+                 pfx='\n/// time `f` in calibrated batches: ns/iter percentiles & ops/sec')
+                // 'let start = Instant::now();'
+                // (S('while start.elapsed() < WARMUP {', '}') // 'f();')
+                // 'let mut iters: u64 = 1;'
+                // (S('loop {', '}')
+                    // 'let t = Instant::now();'
+                    // (S('for _ in 0..iters {', '}') // 'f();')
+                    // (S('if t.elapsed() >= BATCH {', '}') // 'break;')
+                    // 'iters *= 2;')
+                // (S('let mut ns: Vec<f64> = (0..SAMPLES)', '.collect();')
+                    // (S('.map(|_| {', '})')
+                        // 'let t = Instant::now();'
+                        // (S('for _ in 0..iters {', '}') // 'f();')
+                        // 't.elapsed().as_nanos() as f64 / iters as f64'))
+                // 'ns.sort_by(|a, b| a.partial_cmp(b).unwrap());'
+                // 'let p = |q: usize| ns[(SAMPLES - 1) * q / 100];'
+                // (S('println!(', ');')
+                    // '"{:<24} {:>10.1} ns/iter  p10 {:.1}  p90 {:.1}  {:>12.0} ops/s",'
+                    // 'name, p(50), p(10), p(90), 1e9 / p(50)'))
+        #
+        p.rs_bench.main = Sec('bench')
+        p.rs_bench \
+            // (S('fn main() {', '}', pfx='')
+                // (p.rs_bench.main
+                    // 'bench("noop", || black_box(()));'
+                    // 'bench("sum 1000", || {'
+                    // '    black_box(sum(black_box(1000)));'
+                    // '});'))
+
     def f_cargo(self, p):
         p.cargo = tomlFile('Cargo'); p.d // p.cargo
         p.cargo.package = Sec(pfx='[package]'); p.cargo // p.cargo.package
         p.cargo.package \
-            // f'name    = "{p:l}"' \
+            // p.fmt('name    = "{self:l}"') \
             // f'version = "0.0.1"' \
-            // f'authors = ["{p.AUTHOR} <{p.EMAIL}>"]'
+            // p.fmt('authors = ["{AUTHOR} <{EMAIL}>"]')
         p.cargo.deps = Sec(pfx='\n[dependencies]'); p.cargo // p.cargo.deps
         p.cargo.tracing = \
             (Sec('telemetry', pfx='') //
@@ -758,9 +1692,29 @@ class Rust(Mod):
             // 'libc = "0.2"' \
             // p.cargo.tracing \
             // ''
+        #
+        p.cargo.bench = \
+            (Sec(pfx='[[bench]]')
+             // 'name    = "bench"'
+             // 'harness = false' // '')
+        p.cargo.release = \
+            (Sec(pfx='[profile.release]')
+             // '# tuned for benchmarking: slow build, fast & stable binary'
+             // 'opt-level     = 3'
+             // 'lto           = "fat"'
+             // 'codegen-units = 1'
+             // 'incremental   = false' // '')
+        p.cargo.profile = \
+            (Sec(pfx='[profile.bench]')
+             // '# keep symbols for perf/flamegraph'
+             // 'debug = true')
+        p.cargo // p.cargo.bench // p.cargo.release // p.cargo.profile
 
 
 class metaL(Python):
+    regions = {'f_giti': ('', ''), 'f_mk': ('py', 'mk'),
+               'vs_code': ('', 'vscode')}
+
     def pipe(self, p):
         p = super().pipe(p)
         self.p_metal(p)
@@ -769,19 +1723,23 @@ class metaL(Python):
     def f_giti(self, p):
         pass
 
+    ## `f_mk` adds no `bench_py` target, so no `bench_<module>.py` either
+    def p_bench(self, p):
+        pass
+
     def p_metal(self, p):
         p.metal = pyFile('metaL'); p.d // p.metal
         p.metal.top.dropall()
         p.metal // self.p_mods()
 
     def vs_code(self, p):
-        p.vscode.exclude // f'"**/{p}/**":true,'
+        p.vscode.exclude // p.fmt('"**/{self}/**":true,')
         super().vs_code(p)
         p.vscode.multi.replace(0, p.multi('f11', 'make meta'))
 
     def f_mk(self, p):
         # super().f_mk(p)
-        p.mk.src // 'Y += metaL.py test_metaL.py'
+        p.mk.src // 'Y += metaL.py test_metaL.py bench_metaL.py'
         # p.mk.test_py.value += ' test_metaL.py'
         if hasattr(p, 'py'):
             p.mk.all_ \
@@ -806,15 +1764,17 @@ class javaFile(File):
         super().__init__(V, ext, tab, comment)
 
 class Java(Mod):
+    regions = {'vs_code': ('', 'vscode'), 'f_apt': ('', 'dev'),
+               'f_mk': ('package', 'mk lib'), 'f_src': ('package', 'src'),
+               'f_test': ('src', 'src test java_bench')}
 
     def __init__(self, package):
         super().__init__()
         self.package = package
 
     def pipe(self, p):
-        p = super().pipe(p)
         p.package = self.package
-        return p
+        return super().pipe(p)
 
     def vs_code(self, p):
         super().vs_code(p)
@@ -853,21 +1813,21 @@ class Java(Mod):
         #
         p.mk.cfg \
             // (Sec()
-                // f'{"JPATH":<7} = -cp $(shell echo $(CP) | sed "s/ /:/g")'
+                // f'{"JPATH":<7} = -cp $(subst $(space),:,$(strip $(CP)))'
                 // f'{"JFLAGS":<7} = -d $(BIN) $(JPATH)')
 
     def f_mk(self, p):
         super().f_mk(p)
         p.mk.var \
-            // (S(f'{"PACKAGE":<7} = {self.package}',
-                  pfx='# Java project package'))
+            // (p.fmt(f'{"PACKAGE":<7} = {{package}}',
+                      pfx='# Java project package'))
         p.mk.tool \
             // f'{"JAVA":<7} = $(JAVA_HOME)/bin/java' \
             // f'{"JAVAC":<7} = $(JAVA_HOME)/bin/javac'
         #
-        p.mk.src // 'J += $(shell find src -type f -regex ".+.java$$")'
+        p.mk.src // 'J += $(call rwildcard,src,*.java)'
         p.mk.src.s // 'S += $(J)'
-        p.mk.cfg // f'{"CLASS":<7} = $(shell echo $(J) | sed "s|\\.java|.class|g" | sed "s|src/|bin/|g")'
+        p.mk.cfg // f'{"CLASS":<7} = $(patsubst src/%.java,bin/%.class,$(J))'
         #
         p.mk.all.value += ' test format'
         #
@@ -878,6 +1838,16 @@ class Java(Mod):
             // (S('$(JAVA) $(JPATH) \\')
                 // 'org.junit.runner.JUnitCore $(TESTS)')
         #
+        p.mk.benches = Sec(pfx=''); p.mk.bench_.before(p.mk.bench, p.mk.benches)
+        p.mk.benches \
+            // '# every BENCH class runs once per fork, each in a fresh JVM' \
+            // f'{"FORKS":<7} = 1 2 3'
+        p.mk.bench.value += ' bench_java'
+        p.mk.bench_java = S('bench_java: $(CLASS)', pfx='')
+        p.mk.bench_ // p.mk.bench_java
+        p.mk.bench_java \
+            // '$(foreach b,$(BENCH),$(foreach f,$(FORKS),$(JAVA) $(JPATH) $(b) $(f) &&)) true'
+        #
         p.mk.rule // (S('$(CLASS): $(J)')
                       // '$(JAVAC) $(JFLAGS) $^'
                       // '$(MAKE) format')
@@ -916,35 +1886,89 @@ class Java(Mod):
 
     def f_src(self, p):
         super().f_src(p)
-        for i in self.package.split('.'):
-            curr = p.src
-            p.src = Dir(i)
-            curr // p.src
-        p.src // giti()
+        package = Dir(p.fmt('{package!p}')); p.src // package
+        p.src = package; p.src // giti()
 
     def f_test(self, p):
         super().f_test(p)
         p.test = Dir('test'); p.src // p.test; p.test // giti()
-
-
-# from metaL import *
-prj = Project() | metaL() | Java('com.nc.edu.ta.ponyatov.pr2')
-prj.TITLE = 'Java/TA: personal task tracker'
-
-prj.src.task = javaFile('Task'); prj.src // prj.src.task
-prj.src.task // f'package {prj.package};' // ''
-
-prj.mk.tests \
-    // 'TESTS += $(PACKAGE).test.MyTest' \
-    // 'TESTS += $(PACKAGE).test.PartialTest' \
-    // ''
-prj.test.task = javaFile('MyTest'); prj.test // prj.test.task
-prj.test.task \
-    // f'package {prj.package}.test;' // '' \
-    // f'import {prj.package}.*;' // '' \
-    // 'import org.junit.*;' // '' \
-    // ''
-
-prj.mk.zip // 'zip $(ZIP) lib/*.jar'
-
-prj.sync()
+        self.j_bench(p)
+
+    def j_bench(self, p):
+        p.java_bench = Dir('bench'); p.src // p.java_bench; p.java_bench // giti()
+        p.java_bench.runner = javaFile('Bench'); p.java_bench // p.java_bench.runner
+        p.java_bench.runner \
+            // p.fmt('package {package}.bench;') // '' \
+            // 'import java.util.Arrays;' // ''
+        p.java_bench.runner \
+            // (S('public class Bench {', '}',
+                 pfx='/** dependency-free microbenchmark harness: warmup, timed batches, percentiles */')
+                // '/** benchmarked operation, result is consumed by {@link #sink} */'
+                // (S('public interface Op {', '}') // 'long run(int i);')
+                // S('/** consumed results: keeps JIT from eliminating the measured code */', pfx='')
+                // 'public static volatile long sink;'
+                // S('/** warmup batches (JIT compilation) */', pfx='')
+                // 'public static int warmup = 10;'
+                // '/** measured batches */'
+                // 'public static int samples = 30;'
+                // S('/** fork id printed with results: `make bench` runs one JVM per fork */', pfx='')
+                // 'public static String fork = "1";'
+                // S('/**', pfx='')
+                // ' * measure `op` in batches of `ops` calls, print ops/sec and ns/op percentiles'
+                // ' *' // ' * @return median ns/op' // ' */'
+                // (S('public static double run(String name, int ops, Op op) {', '}')
+                    // 'long acc = 0;'
+                    // (S('for (int w = 0; w < warmup; w++) {', '}')
+                        // 'for (int i = 0; i < ops; i++) acc += op.run(i);')
+                    // 'double[] ns = new double[samples];'
+                    // (S('for (int s = 0; s < samples; s++) {', '}')
+                        // 'long t = System.nanoTime();'
+                        // 'for (int i = 0; i < ops; i++) acc += op.run(i);'
+                        // 'ns[s] = (double) (System.nanoTime() - t) / ops;')
+                    // 'sink = acc;'
+                    // 'Arrays.sort(ns);'
+                    // 'double p50 = percentile(ns, 50);'
+                    // (S('System.out.printf(', ');')
+                        // '"fork %s %-28s %,14.0f ops/s  p50 %8.2f  p90 %8.2f  p99 %8.2f ns/op%n",'
+                        // 'fork, name, 1e9 / p50, p50, percentile(ns, 90), percentile(ns, 99)')
+                    // 'return p50;')
+                // S('/** nearest-rank percentile of sorted samples */', pfx='')
+                // (S('public static double percentile(double[] sorted, double q) {', '}')
+                    // 'int idx = (int) Math.ceil(q / 100 * sorted.length) - 1;'
+                    // 'return sorted[Math.max(0, Math.min(sorted.length - 1, idx))];'))
+
+
+## script: `from metaL import *` gets the library without generating
+if __name__ == '__main__':
+    prj = Project() | metaL() | Java('com.nc.edu.ta.ponyatov.pr2')
+    prj.TITLE = 'Java/TA: personal task tracker'
+
+    prj.src.task = javaFile('Task'); prj.src // prj.src.task
+    prj.src.task // prj.fmt('package {package};') // ''
+    prj.src.scheduler = javaFile('Scheduler'); prj.src // prj.src.scheduler
+    prj.src.scheduler // prj.fmt('package {package};') // ''
+    prj.src.file = javaFile('TaskFile'); prj.src // prj.src.file
+    prj.src.file // prj.fmt('package {package};') // ''
+
+    prj.mk.tests \
+        // 'TESTS += $(PACKAGE).test.MyTest' \
+        // 'TESTS += $(PACKAGE).test.PartialTest' \
+        // 'TESTS += $(PACKAGE).test.SchedulerTest' \
+        // 'TESTS += $(PACKAGE).test.TaskFileTest' \
+        // ''
+    prj.test.task = javaFile('MyTest'); prj.test // prj.test.task
+    prj.test.task \
+        // prj.fmt('package {package}.test;') // '' \
+        // prj.fmt('import {package}.*;') // '' \
+        // 'import org.junit.*;' // '' \
+        // ''
+
+    prj.mk.benches // 'BENCH += $(PACKAGE).bench.TaskBench'
+    prj.java_bench.task = javaFile('TaskBench'); prj.java_bench // prj.java_bench.task
+    prj.java_bench.task \
+        // prj.fmt('package {package}.bench;') // '' \
+        // prj.fmt('import {package}.*;') // ''
+
+    prj.mk.zip // 'zip $(ZIP) lib/*.jar'
+
+    prj.sync()
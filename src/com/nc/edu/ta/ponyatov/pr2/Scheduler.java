@@ -0,0 +1,165 @@
+package com.nc.edu.ta.ponyatov.pr2;
+
+import java.util.Arrays;
+import java.util.function.ObjIntConsumer;
+
+/**
+ * Notification dispatcher for active tasks
+ *
+ * <ul>
+ *   <li>indexed binary min-heap keyed by the next notification time
+ *   <li>{@link Task#setActive} / {@link Task#setTime} re-key a task in O(log n)
+ *   <li>periodic tasks are re-queued with {@link Task#nextTimeAfter} on every fire
+ * </ul>
+ */
+public class Scheduler {
+  /** queued tasks, heap ordered by {@link Task#next} */
+  private Task[] heap = new Task[16];
+  /** queued tasks count */
+  private int size;
+  /** current time: notifications up to it are dispatched, seconds */
+  private int now;
+
+  /** create scheduler starting at time 0 */
+  public Scheduler() {
+    this(0);
+  }
+
+  /** @param now start time, seconds */
+  public Scheduler(int now) {
+    this.now = now;
+  }
+
+  /** @return queued tasks count */
+  public int size() {
+    return size;
+  }
+
+  /** @return {@link #now} */
+  public int getTime() {
+    return now;
+  }
+
+  /** @return next notification time, -1 if nothing is queued */
+  public int nextTime() {
+    return size > 0 ? heap[0].next : -1;
+  }
+
+  /**
+   * track task: queued while active, re-keyed on every change until {@link #remove}
+   *
+   * @param task moved here if tracked by another scheduler
+   */
+  public void add(Task task) {
+    if (task.scheduler == this) return;
+    if (task.scheduler != null) task.scheduler.remove(task);
+    task.scheduler = this;
+    update(task);
+  }
+
+  /** stop tracking task */
+  public void remove(Task task) {
+    if (task.scheduler != this) return;
+    if (task.slot >= 0) removeAt(task.slot);
+    task.scheduler = null;
+  }
+
+  /**
+   * re-key task after change: next notification strictly after {@link #now}
+   *
+   * @param task tracked by this scheduler
+   */
+  void update(Task task) {
+    int next = task.nextTimeAfter(now);
+    if (task.slot < 0) {
+      if (next < 0) return;
+      task.next = next;
+      push(task);
+    } else if (next < 0) {
+      removeAt(task.slot);
+    } else {
+      int prev = task.next;
+      task.next = next;
+      if (next < prev) up(task.slot);
+      else down(task.slot);
+    }
+  }
+
+  /**
+   * dispatch every notification due up to `time` in time order
+   *
+   * @param time fire until, seconds
+   * @param notify callback: task and its notification time
+   * @return dispatched notifications count
+   */
+  public int fire(int time, ObjIntConsumer<Task> notify) {
+    int count = 0;
+    while (size > 0 && heap[0].next <= time) {
+      Task task = heap[0];
+      now = task.next;
+      int next = task.nextTimeAfter(now);
+      if (next < 0) {
+        removeAt(0);
+      } else {
+        task.next = next;
+        down(0);
+      }
+      count++;
+      notify.accept(task, now);
+    }
+    if (time > now) now = time;
+    return count;
+  }
+
+  private void push(Task task) {
+    if (size == heap.length) heap = Arrays.copyOf(heap, size * 2);
+    heap[size] = task;
+    task.slot = size++;
+    up(task.slot);
+  }
+
+  private void removeAt(int i) {
+    Task task = heap[i];
+    Task last = heap[--size];
+    heap[size] = null;
+    task.slot = -1;
+    if (i < size) {
+      heap[i] = last;
+      last.slot = i;
+      if (up(i) == i) down(i);
+    }
+  }
+
+  /** @return final heap index */
+  private int up(int i) {
+    Task task = heap[i];
+    while (i > 0) {
+      int parent = (i - 1) >>> 1;
+      Task that = heap[parent];
+      if (that.next <= task.next) break;
+      heap[i] = that;
+      that.slot = i;
+      i = parent;
+    }
+    heap[i] = task;
+    task.slot = i;
+    return i;
+  }
+
+  private void down(int i) {
+    Task task = heap[i];
+    int half = size >>> 1;
+    while (i < half) {
+      int child = 2 * i + 1;
+      Task that = heap[child];
+      int right = child + 1;
+      if (right < size && heap[right].next < that.next) that = heap[child = right];
+      if (task.next <= that.next) break;
+      heap[i] = that;
+      that.slot = i;
+      i = child;
+    }
+    heap[i] = task;
+    task.slot = i;
+  }
+}
@@ -16,6 +16,13 @@ public class Task {
   /** is current task active flag */
   public boolean active;
 
+  /** {@link Scheduler} tracking this task, null if none */
+  Scheduler scheduler;
+  /** {@link Scheduler} heap index, -1 if not queued */
+  int slot = -1;
+  /** next notification time queued in {@link #scheduler} */
+  int next = -1;
+
   /**
    * create single-time task
    *
@@ -72,6 +79,20 @@ public class Task {
     this(title, start, end, repeat, false);
   }
 
+  /**
+   * restore stored task as is: no validation
+   *
+   * @see TaskFile#get(int)
+   */
+  Task(String title, int start, int end, int repeat, boolean periodic, boolean active) {
+    this.title = title;
+    this.start = start;
+    this.end = end;
+    this.repeat = repeat;
+    this.periodic = periodic;
+    this.active = active;
+  }
+
   /** @return {@link #title} */
   public String getTitle() {
     return title;
@@ -96,6 +117,7 @@ public class Task {
    */
   public void setActive(boolean active) {
     this.active = active;
+    if (scheduler != null) scheduler.update(this);
   }
 
   /**
@@ -121,6 +143,7 @@ public class Task {
     this.end = this.start;
     this.repeat = 0;
     if (time == 0) this.active = false;
+    if (scheduler != null) scheduler.update(this);
   }
 
   /**
@@ -139,6 +162,7 @@ public class Task {
     this.end = end;
     this.repeat = repeat;
     if (start == 0) this.active = false;
+    if (scheduler != null) scheduler.update(this);
   }
 
   /** @return {@link #start} */
@@ -213,10 +237,9 @@ public class Task {
         return -1;
       }
     }
-    // periodic task
-    for (int t = start; t <= end; t += repeat) {
-      if (t > time) return t;
-    }
-    return -1;
+    // periodic task: first `start + k * repeat` after `time`, O(1)
+    if (time < start) return start;
+    long t = start + ((long) (time - start) / repeat + 1) * repeat;
+    return t <= end ? (int) t : -1;
   }
 }
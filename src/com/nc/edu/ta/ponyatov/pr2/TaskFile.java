@@ -0,0 +1,183 @@
+package com.nc.edu.ta.ponyatov.pr2;
+
+import static java.nio.charset.StandardCharsets.UTF_8;
+
+import java.io.BufferedOutputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.io.UTFDataFormatException;
+import java.nio.ByteBuffer;
+import java.nio.channels.FileChannel;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.StandardOpenOption;
+import java.util.Arrays;
+import java.util.Collection;
+import java.util.HashMap;
+import java.util.Map;
+
+/**
+ * Compact binary task storage
+ *
+ * <ul>
+ *   <li>header: {@link #MAGIC}, {@link #VERSION}, tasks count, string table offset
+ *   <li>fixed {@link #RECORD} bytes per task: title offset, start, end, repeat, flags
+ *   <li>string table: deduplicated titles, u16 length + UTF-8 bytes
+ * </ul>
+ *
+ * <p>file is memory-mapped on {@link #open}, fields are decoded on access
+ */
+public class TaskFile {
+  /** `TASK` */
+  public static final int MAGIC = 0x5441534B;
+  /** format version */
+  public static final int VERSION = 1;
+  /** header size, bytes */
+  static final int HEADER = 16;
+  /** task record size, bytes */
+  static final int RECORD = 20;
+  /** record flags */
+  static final int ACTIVE = 1, PERIODIC = 2;
+
+  /** mapped file */
+  private final ByteBuffer buf;
+  /** tasks count */
+  private final int size;
+  /** string table offset */
+  private final int strings;
+
+  private TaskFile(ByteBuffer buf) throws IOException {
+    if (buf.limit() < HEADER || buf.getInt(0) != MAGIC) throw new IOException("not a task file");
+    if (buf.getInt(4) != VERSION) throw new IOException("task file version " + buf.getInt(4));
+    this.buf = buf;
+    this.size = buf.getInt(8);
+    this.strings = buf.getInt(12);
+    if (size < 0 || strings != HEADER + (long) size * RECORD || strings > buf.limit())
+      throw new IOException("truncated task file");
+  }
+
+  /**
+   * map task file: O(1), nothing is decoded until accessed
+   *
+   * @param file written by {@link #write(Path, Collection)}
+   */
+  public static TaskFile open(Path file) throws IOException {
+    try (FileChannel channel = FileChannel.open(file, StandardOpenOption.READ)) {
+      return new TaskFile(channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size()));
+    }
+  }
+
+  /**
+   * store tasks in a single buffered pass: records are streamed, titles are collected into the
+   * string table appended at the end
+   *
+   * @throws UTFDataFormatException title longer than 65535 UTF-8 bytes
+   * @throws IOException file would not fit int offsets; no partial file is left
+   */
+  public static void write(Path file, Collection<Task> tasks) throws IOException {
+    long strings = HEADER + (long) tasks.size() * RECORD;
+    if (strings > Integer.MAX_VALUE) throw new IOException("too many tasks: " + tasks.size());
+    Map<String, Integer> offsets = new HashMap<>();
+    ByteArrayOutputStream table = new ByteArrayOutputStream();
+    DataOutputStream titles = new DataOutputStream(table);
+    try {
+      try (DataOutputStream out =
+          new DataOutputStream(new BufferedOutputStream(Files.newOutputStream(file), 1 << 16))) {
+        out.writeInt(MAGIC);
+        out.writeInt(VERSION);
+        out.writeInt(tasks.size());
+        out.writeInt((int) strings);
+        for (Task task : tasks) {
+          Integer offset = offsets.get(task.title);
+          if (offset == null) {
+            byte[] utf = task.title.getBytes(UTF_8);
+            // `title` is a public field: `setTitle` limits may be bypassed
+            if (utf.length > 0xFFFF)
+              throw new UTFDataFormatException("task title of " + utf.length + " bytes");
+            if (strings + table.size() + 2 + utf.length > Integer.MAX_VALUE)
+              throw new IOException("task file too large");
+            offset = table.size();
+            offsets.put(task.title, offset);
+            titles.writeShort(utf.length);
+            titles.write(utf);
+          }
+          out.writeInt(offset);
+          out.writeInt(task.start);
+          out.writeInt(task.end);
+          out.writeInt(task.repeat);
+          out.writeInt((task.active ? ACTIVE : 0) | (task.isPeriodic() ? PERIODIC : 0));
+        }
+        table.writeTo(out);
+      }
+    } catch (IOException | RuntimeException e) {
+      Files.deleteIfExists(file);
+      throw e;
+    }
+  }
+
+  /** @see #write(Path, Collection) */
+  public static void write(Path file, Task... tasks) throws IOException {
+    write(file, Arrays.asList(tasks));
+  }
+
+  /** @return tasks count */
+  public int size() {
+    return size;
+  }
+
+  /** @return int at `field` offset of `i`-th record */
+  private int field(int i, int field) {
+    if (i < 0 || i >= size) throw new IndexOutOfBoundsException("task " + i + " of " + size);
+    return buf.getInt(HEADER + i * RECORD + field);
+  }
+
+  /** @return {@link Task#title} of `i`-th task */
+  public String title(int i) {
+    int offset = strings + field(i, 0);
+    byte[] utf = new byte[buf.getShort(offset) & 0xFFFF];
+    ByteBuffer src = buf.duplicate();
+    src.position(offset + 2);
+    src.get(utf);
+    return new String(utf, UTF_8);
+  }
+
+  /** @return {@link Task#start} of `i`-th task */
+  public int start(int i) {
+    return field(i, 4);
+  }
+
+  /** @return {@link Task#end} of `i`-th task */
+  public int end(int i) {
+    return field(i, 8);
+  }
+
+  /** @return {@link Task#repeat} of `i`-th task */
+  public int repeat(int i) {
+    return field(i, 12);
+  }
+
+  /** @return {@link Task#active} of `i`-th task */
+  public boolean isActive(int i) {
+    return (field(i, 16) & ACTIVE) != 0;
+  }
+
+  /** @return {@link Task#isPeriodic} of `i`-th task */
+  public boolean isPeriodic(int i) {
+    return (field(i, 16) & PERIODIC) != 0;
+  }
+
+  /**
+   * @return `i`-th task restored as stored, bypassing setters
+   * @throws IllegalStateException corrupt periodic record: `repeat <= 0` or `end < start` would
+   *     break {@link Task#nextTimeAfter}
+   */
+  public Task get(int i) {
+    int start = start(i), end = end(i), repeat = repeat(i);
+    boolean periodic = isPeriodic(i);
+    if (periodic && (repeat <= 0 || end < start))
+      throw new IllegalStateException(
+          "corrupt periodic task " + i + ": " + start + ".." + end + " every " + repeat);
+    return new Task(title(i), start, end, repeat, periodic, isActive(i));
+  }
+}
@@ -0,0 +1,53 @@
+package com.nc.edu.ta.ponyatov.pr2.bench;
+
+import java.util.Arrays;
+
+/** dependency-free microbenchmark harness: warmup, timed batches, percentiles */
+public class Bench {
+  /** benchmarked operation, result is consumed by {@link #sink} */
+  public interface Op {
+    long run(int i);
+  }
+
+  /** consumed results: keeps JIT from eliminating the measured code */
+  public static volatile long sink;
+
+  /** warmup batches (JIT compilation) */
+  public static int warmup = 10;
+  /** measured batches */
+  public static int samples = 30;
+
+  /** fork id printed with results: `make bench` runs one JVM per fork */
+  public static String fork = "1";
+
+  /**
+   * measure `op` in batches of `ops` calls, print ops/sec and ns/op percentiles
+   *
+   * @return median ns/op
+   */
+  public static double run(String name, int ops, Op op) {
+    long acc = 0;
+    for (int w = 0; w < warmup; w++) {
+      for (int i = 0; i < ops; i++) acc += op.run(i);
+    }
+    double[] ns = new double[samples];
+    for (int s = 0; s < samples; s++) {
+      long t = System.nanoTime();
+      for (int i = 0; i < ops; i++) acc += op.run(i);
+      ns[s] = (double) (System.nanoTime() - t) / ops;
+    }
+    sink = acc;
+    Arrays.sort(ns);
+    double p50 = percentile(ns, 50);
+    System.out.printf(
+        "fork %s %-28s %,14.0f ops/s  p50 %8.2f  p90 %8.2f  p99 %8.2f ns/op%n",
+        fork, name, 1e9 / p50, p50, percentile(ns, 90), percentile(ns, 99));
+    return p50;
+  }
+
+  /** nearest-rank percentile of sorted samples */
+  public static double percentile(double[] sorted, double q) {
+    int idx = (int) Math.ceil(q / 100 * sorted.length) - 1;
+    return sorted[Math.max(0, Math.min(sorted.length - 1, idx))];
+  }
+}
@@ -0,0 +1,26 @@
+package com.nc.edu.ta.ponyatov.pr2.bench;
+
+import com.nc.edu.ta.ponyatov.pr2.*;
+
+/** {@link Task} hot path: construction, {@link Task#nextTimeAfter}, toString */
+public class TaskBench {
+
+  /** @param args fork id (from `make bench`) */
+  public static void main(String[] args) {
+    if (args.length > 0) Bench.fork = args[0];
+    //
+    Bench.run("new Task(single)", 1_000_000, i -> new Task("single", i + 1, true).start);
+    Bench.run(
+        "new Task(periodic)", 1_000_000, i -> new Task("periodic", i + 1, i + 100, 10, true).end);
+    //
+    final Task single = new Task("single", 500_000, true);
+    Bench.run("single.nextTimeAfter", 1_000_000, i -> single.nextTimeAfter(i));
+    final Task periodic = new Task("periodic", 1, 1_000_000, 1_000, true);
+    Bench.run("periodic.nextTimeAfter", 10_000, i -> periodic.nextTimeAfter(i * 100));
+    final Task inactive = new Task("inactive", 1, 1_000_000, 1_000);
+    Bench.run("inactive.nextTimeAfter", 1_000_000, i -> inactive.nextTimeAfter(i));
+    //
+    final Task[] tasks = {single, periodic, inactive, new Task("other", 1234, true)};
+    Bench.run("toString", 1_000_000, i -> tasks[i & 3].toString().length());
+  }
+}
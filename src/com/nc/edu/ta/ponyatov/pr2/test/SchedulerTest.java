@@ -0,0 +1,116 @@
+package com.nc.edu.ta.ponyatov.pr2.test;
+
+import static org.junit.Assert.*;
+
+import com.nc.edu.ta.ponyatov.pr2.*;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+import org.junit.*;
+
+public class SchedulerTest {
+
+  /** notification times log */
+  private List<Integer> fired = new ArrayList<>();
+
+  private void log(Task task, int time) {
+    fired.add(time);
+  }
+
+  @Test
+  public void single() {
+    Scheduler scheduler = new Scheduler();
+    Task task = new Task("single", 10);
+    task.setActive(true);
+    scheduler.add(task);
+    assertEquals(10, scheduler.nextTime());
+    assertEquals(0, scheduler.fire(9, this::log));
+    assertEquals(1, scheduler.fire(10, this::log));
+    assertEquals(0, scheduler.size());
+    assertEquals(-1, scheduler.nextTime());
+    assertEquals(Arrays.asList(10), fired);
+  }
+
+  @Test
+  public void periodic() {
+    Scheduler scheduler = new Scheduler();
+    Task task = new Task("periodic", 10, 100, 20);
+    task.setActive(true);
+    scheduler.add(task);
+    assertEquals(5, scheduler.fire(1000, this::log));
+    assertEquals(Arrays.asList(10, 30, 50, 70, 90), fired);
+    assertEquals(1000, scheduler.getTime());
+  }
+
+  @Test
+  public void order() {
+    Scheduler scheduler = new Scheduler();
+    for (Task task :
+        new Task[] {
+          new Task("a", 40), new Task("b", 5, 50, 15), new Task("c", 20), new Task("d", 7, 8, 1)
+        }) {
+      task.setActive(true);
+      scheduler.add(task);
+    }
+    assertEquals(8, scheduler.fire(100, this::log));
+    assertEquals(Arrays.asList(5, 7, 8, 20, 20, 35, 40, 50), fired);
+  }
+
+  @Test
+  public void update() {
+    Scheduler scheduler = new Scheduler();
+    Task task = new Task("update", 10, 100, 10);
+    scheduler.add(task);
+    assertEquals(0, scheduler.size());
+    task.setActive(true);
+    assertEquals(10, scheduler.nextTime());
+    task.setTime(50);
+    assertEquals(50, scheduler.nextTime());
+    task.setTime(30, 90, 30);
+    assertEquals(30, scheduler.nextTime());
+    scheduler.fire(45, this::log);
+    task.setTime(40, 100, 5);
+    assertEquals(50, scheduler.nextTime());
+    task.setActive(false);
+    assertEquals(0, scheduler.size());
+    scheduler.remove(task);
+    task.setActive(true);
+    assertEquals(0, scheduler.size());
+    assertEquals(Arrays.asList(30), fired);
+  }
+
+  @Test
+  public void throughput() {
+    final int N = 1_000_000;
+    Scheduler scheduler = new Scheduler();
+    Task[] tasks = new Task[N];
+    long t0 = System.nanoTime();
+    for (int i = 0; i < N; i++) {
+      int start = 1 + i % 1000;
+      tasks[i] = new Task("task", start, start + 999, 250);
+      tasks[i].setActive(true);
+      scheduler.add(tasks[i]);
+    }
+    long t1 = System.nanoTime();
+    // every other task off and on again: 2 re-keys each
+    for (int i = 0; i < N; i += 2) tasks[i].setActive(false);
+    assertEquals(N / 2, scheduler.size());
+    for (int i = 0; i < N; i += 2) tasks[i].setActive(true);
+    assertEquals(N, scheduler.size());
+    long t2 = System.nanoTime();
+    int[] last = {0};
+    int count =
+        scheduler.fire(
+            Integer.MAX_VALUE,
+            (task, time) -> {
+              assertTrue(time >= last[0]);
+              last[0] = time;
+            });
+    long t3 = System.nanoTime();
+    assertEquals(4 * N, count);
+    assertEquals(0, scheduler.size());
+    System.out.printf(
+        "scheduler %d tasks: add %.0f ops/s, update %.0f ops/s, fire %.0f ops/s%n",
+        N, N * 1e9 / (t1 - t0), N * 1e9 / (t2 - t1), count * 1e9 / (t3 - t2));
+  }
+}
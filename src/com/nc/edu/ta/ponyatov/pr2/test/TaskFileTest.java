@@ -0,0 +1,113 @@
+package com.nc.edu.ta.ponyatov.pr2.test;
+
+import static org.junit.Assert.*;
+
+import com.nc.edu.ta.ponyatov.pr2.*;
+import java.io.IOException;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.util.Arrays;
+import org.junit.*;
+import org.junit.rules.TemporaryFolder;
+
+public class TaskFileTest {
+
+  @Rule public TemporaryFolder tmp = new TemporaryFolder();
+
+  private TaskFile roundtrip(Task... tasks) throws IOException {
+    Path file = tmp.newFile().toPath();
+    TaskFile.write(file, tasks);
+    TaskFile loaded = TaskFile.open(file);
+    assertEquals(tasks.length, loaded.size());
+    for (int i = 0; i < tasks.length; i++) {
+      Task task = loaded.get(i);
+      assertEquals(tasks[i].getTitle(), task.getTitle());
+      assertEquals(tasks[i].getStartTime(), task.getStartTime());
+      assertEquals(tasks[i].getEndTime(), task.getEndTime());
+      assertEquals(tasks[i].getRepeatInterval(), task.getRepeatInterval());
+      assertEquals(tasks[i].isPeriodic(), task.isPeriodic());
+      assertEquals(tasks[i].isActive(), task.isActive());
+      assertEquals(tasks[i].toString(), task.toString());
+      assertEquals(tasks[i].nextTimeAfter(15), task.nextTimeAfter(15));
+    }
+    return loaded;
+  }
+
+  @Test
+  public void periodic() throws IOException {
+    TaskFile loaded = roundtrip(new Task("periodic", 10, 100, 5, true));
+    assertEquals("periodic", loaded.title(0));
+    assertEquals(10, loaded.start(0));
+    assertEquals(100, loaded.end(0));
+    assertEquals(5, loaded.repeat(0));
+    assertTrue(loaded.isPeriodic(0));
+    assertTrue(loaded.isActive(0));
+  }
+
+  @Test
+  public void single() throws IOException {
+    TaskFile loaded = roundtrip(new Task("single", 50, true));
+    assertEquals(50, loaded.start(0));
+    assertEquals(50, loaded.end(0));
+    assertEquals(0, loaded.repeat(0));
+    assertFalse(loaded.isPeriodic(0));
+  }
+
+  @Test
+  public void inactive() throws IOException {
+    roundtrip(new Task("inactive single", 50), new Task("inactive periodic", 10, 100, 5));
+  }
+
+  @Test
+  public void unicode() throws IOException {
+    String title = "\u0437\u0430\u0434\u0430\u0447\u0430 \u2713";
+    assertEquals(title, roundtrip(new Task(title, 1)).title(0));
+  }
+
+  @Test
+  public void titles() throws IOException {
+    Path file = tmp.newFile().toPath();
+    TaskFile.write(file, new Task("a", 1, 9, 2), new Task("b", 3), new Task("a", 5));
+    // header + 3 records + deduplicated titles
+    assertEquals(16 + 3 * 20 + 2 * (2 + 1), Files.size(file));
+    assertEquals("a", TaskFile.open(file).title(2));
+  }
+
+  @Test
+  public void empty() throws IOException {
+    assertEquals(0, roundtrip().size());
+  }
+
+  @Test
+  public void longTitle() throws IOException {
+    Task task = new Task("long", 1);
+    char[] title = new char[70000];
+    Arrays.fill(title, 'x');
+    task.title = new String(title);
+    Path file = tmp.newFile().toPath();
+    try {
+      TaskFile.write(file, new Task("short", 1), task);
+      fail("title over 65535 bytes written");
+    } catch (IOException e) {
+      assertFalse(Files.exists(file));
+    }
+  }
+
+  @Test(expected = IllegalStateException.class)
+  public void corruptRepeat() throws IOException {
+    Path file = tmp.newFile().toPath();
+    TaskFile.write(file, new Task("periodic", 10, 100, 5, true));
+    byte[] data = Files.readAllBytes(file);
+    // `repeat` field of the first record
+    Arrays.fill(data, 16 + 12, 16 + 16, (byte) 0);
+    Files.write(file, data);
+    TaskFile.open(file).get(0);
+  }
+
+  @Test(expected = IOException.class)
+  public void magic() throws IOException {
+    Path file = tmp.newFile().toPath();
+    Files.write(file, "not a task file at all".getBytes());
+    TaskFile.open(file);
+  }
+}
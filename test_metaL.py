@@ -0,0 +1,241 @@
+import io, tarfile, zipfile
+import pytest
+from metaL import *
+
+## text file `to` render into
+def to(): return File('to')
+
+def mem(p):
+    fs = Mem(); p.sync(fs); return fs
+
+## @name backends
+
+def test_fs_abstract():
+    with pytest.raises(TypeError): FS()
+
+def test_mem():
+    d = Dir('d') // (Dir('e/f') // (File('f', '.txt') // 'hello'))
+    fs = Mem(); d.sync(fs)
+    assert fs.dirs == {'d', 'd/e', 'd/e/f'}
+    assert fs.tree == {'d/e/f/f.txt': b'hello\n'}
+
+def test_dedupe():
+    d = Dir('d') // (File('f') // 'first') // (Dir('e') // File('x')) \
+        // (File('f') // 'last') // (Dir('e') // File('y'))
+    fs = Mem(); d.sync(fs)
+    assert fs.tree == {'d/f': b'last\n', 'd/e/x': b'', 'd/e/y': b''}
+
+## @name lazy nodes
+
+def test_stream():
+    assert Stream(['a', 'b\n']).gen(to()) == 'a\nb\n'
+    assert (S('{', '}') // Stream(lambda: iter('xy'))).gen(to()) == \
+        '{\n\tx\n\ty\n}\n'
+
+def test_stream_nested():
+    n = -1
+    def src():
+        nonlocal n
+        for n in range(100000): yield f'{n}'
+    f = File('f') // (S('def f():', '') // (S('for i in (', ')') // Stream(src)))
+    it = f.stream(); text = ''
+    while '\t\t0\n' not in text: text += next(it)
+    # only the first generated line is consumed, not the whole generator
+    assert n == 0 and len(text) < 100
+    text += ''.join(it)
+    assert text.startswith('def f():\n\tfor i in (\n\t\t0\n\t\t1\n')
+    assert text.endswith('\t\t99999\n\t)\n\n') and n == 99999
+
+def test_include(tmp_path):
+    src = tmp_path / 'inc.txt'; src.write_text('one\ntwo\n')
+    f = File('f') // S('head') // Include(str(src))
+    fs = Mem(); f.sync(fs)
+    assert fs.tree == {'f': b'head\none\ntwo\n'}
+
+def tree():
+    return (Sec('root')
+            // (S('a {', '}', pfx='') // 'x' // (Sec('in') // 'y') // Sec())
+            // Stream(['lazy'])
+            // S('b', sfx=''))
+
+def test_gen_stream():
+    t = tree(); f = t.fork()
+    assert t.gen(to()) == ''.join(t.stream(to())) == f.gen(to())
+    assert t.gen(to()).startswith('# \\ root\n\na {\n\tx\n\t# \\ in\n')
+
+## @name struct-of-arrays store
+
+def test_store_gen():
+    t = tree(); store = Store(); f = Frame(store, store.load(t))
+    assert f.gen(to()) == t.gen(to())
+    assert ''.join(f.stream(to())) == t.gen(to())
+    assert f.test() == t.test()
+    store.pack()
+    assert f.gen(to()) == t.gen(to())
+
+def test_store_thaw():
+    t = tree(); store = Store()
+    assert store.thaw(store.load(t)).gen(to()) == t.gen(to())
+
+def test_store_head(monkeypatch):
+    d = (Project('h') | Python()).d; store = Store(); idx = store.load(d)
+    # `Dir`/`File`/`Fmt` headers need a single node, not a thawed subtree
+    monkeypatch.setattr(Store, 'thaw', None)
+    assert store.dump(idx, test=True) == d.dump(test=True)
+
+def test_frame_ops():
+    t = tree(); store = Store(); store.pack()
+    f = Frame(store, store.load(t)); store.pack()
+    for i in (t, f):
+        i // 'push'; i.ins(0, 'first'); i.replace(1, 'second')
+    assert not store.packed
+    assert f.gen(to()) == t.gen(to())
+    f.dropall(); assert f.gen(to()) == ''
+
+def test_store_copy():
+    store = Store(); f = Frame(store, store.load(tree()))
+    copy = store.copy(); f // 'more'
+    assert Frame(copy, f.id).gen(to()) != f.gen(to())
+    assert Frame(copy, f.id).gen(to()) == tree().gen(to())
+
+## @name copy-on-write fork
+
+def test_fork():
+    base = S('base') // (S('a') // 'x') // 'y'
+    f = base.fork(); next(iter(f)) // 'z'
+    assert base.gen(to()) == 'base\n\ta\n\t\tx\n\ty\n'
+    assert f.gen(to()) == 'base\n\ta\n\t\tx\n\t\tz\n\ty\n'
+
+def test_project_fork():
+    base = Project('pf') | Python()
+    assert mem(base.fork()).tree == mem(Project('pf') | Python()).tree
+
+def test_fork_rename():
+    base = Project('py1') | Python()
+    assert mem(base.fork('py2')).tree == mem(Project('py2') | Python()).tree
+    base = Project('b') | metaL() | Java('a.b'); h = base.fork('c'); h.package = 'x.y'
+    assert mem(h).tree == mem(Project('c') | metaL() | Java('x.y')).tree
+    assert mem(base).tree == mem(Project('b') | metaL() | Java('a.b')).tree
+
+def test_fork_frozen():
+    base = Project('t') | Java('a.b'); f = base.fork(); before = mem(f).tree
+    with pytest.raises(TypeError): base.mk.tests // 'TESTS += LEAK'
+    with pytest.raises(TypeError): base.src.dropall()
+    assert mem(f).tree == before
+    f.mk.cfg // 'X = 1'; f.mk.tests // 'TESTS += OWN'
+    assert b'TESTS += OWN' in mem(f).tree['t/Makefile']
+    assert b'X = 1' not in mem(base).tree['t/Makefile']
+    # childless `mk.rule` is shared while rendering, forked on explicit access
+    leaf = Project('l'); f = leaf.fork(); mem(f); f.mk.rule // 'rule:'
+    assert b'rule:' in mem(f).tree['l/Makefile']
+    assert b'rule:' not in mem(leaf).tree['l/Makefile']
+    f = base.fork(); g = f.fork('g')
+    with pytest.raises(TypeError): f.mk.tests // 'TESTS += LEAK'
+    g.mk.tests // 'TESTS += G'
+    assert b'TESTS += G' not in mem(f).tree['t/Makefile']
+
+## @name reactive lines
+
+def test_fmt():
+    p = Project('fmt')
+    line = p.fmt('{TITLE} by {AUTHOR}')
+    assert line.gen(to()) == 'fmt by Dmitry Ponyatov\n'
+    p.TITLE = 'reactive'
+    assert line.gen(to()) == 'reactive by Dmitry Ponyatov\n'
+    assert mem(p).tree['fmt/README.md'].startswith(b'# ![logo](doc/logo.png) `fmt`\n## reactive\n')
+
+def test_rename():
+    p = Project('old') | Python() | Java('a.b')
+    p.value = 'new'; p.package = 'x.y.z'
+    fs = mem(p)
+    assert {'new/new.py', 'new/test_new.py', 'new/bench_new.py'} <= set(fs.tree)
+    assert b'from new import *' in fs.tree['new/test_new.py']
+    assert 'new/src/x/y/z/test' in fs.dirs
+    assert not [i for i in fs.tree if 'old' in i or '/a/' in i]
+
+## @name hook scheduler
+
+def test_run_serial(monkeypatch):
+    monkeypatch.setattr(Mod, 'pools', {})
+    assert Mod.workers == 0
+    Project('serial') | Python() | Rust()
+    assert Mod.pools == {}
+
+def test_run_pools(monkeypatch):
+    monkeypatch.setattr(Mod, 'pools', {})
+    p = Project('pools')
+    for n in (2, 3, 2):
+        i = Rust(); i.workers = n; p = p | i
+    assert {k: v._max_workers for k, v in Mod.pools.items()} == {2: 2, 3: 3}
+
+@pytest.mark.parametrize('mods', [
+    lambda: [Python()], lambda: [Rust()],
+    lambda: [metaL(), Java('a.b')], lambda: [Python(), Rust()]])
+def test_run_parallel(mods):
+    def build(workers):
+        p = Project('par')
+        for i in mods(): i.workers = workers; p = p | i
+        return mem(p).tree
+    assert build(4) == build(0)
+
+## @name benchmarks
+
+def test_rust_bench_lib():
+    fs = mem(Project('rl') | Rust())
+    assert b'pub fn sum(n: u64) -> u64 {' in fs.tree['rl/src/lib.rs']
+    assert b'use rl::sum;' in fs.tree['rl/benches/bench.rs']
+    # `-` is not allowed in Rust paths: the lib crate is `my_proj`
+    fs = mem(Project('my-proj') | Rust())
+    assert b'name    = "my-proj"' in fs.tree['my-proj/Cargo.toml']
+    assert b'use my_proj::sum;' in fs.tree['my-proj/benches/bench.rs']
+
+def test_bench_targets():
+    mk = mem(Project('pr') | Python() | Rust()).tree['pr/Makefile'].decode()
+    assert [i for i in mk.split('\n') if i.startswith('bench')] == \
+        ['bench: bench_py bench_rs',
+         'bench_py: $(PY) bench_$(MODULE).py', 'bench_rs: Cargo.toml $(R)']
+    assert 'meta/bench_meta.py' not in mem(Project('meta') | metaL()).tree
+
+## @name release archive
+
+def test_archive_zip(tmp_path):
+    p = Project('arc') | Python(); fs = mem(p)
+    path = p.archive(str(tmp_path / 'a.zip'))
+    with zipfile.ZipFile(path) as z:
+        files = {i.filename: z.read(i) for i in z.infolist() if not i.is_dir()}
+    assert files == fs.tree
+    with open(path, 'rb') as F: first = F.read()
+    with open(p.archive(path), 'rb') as F: assert F.read() == first
+
+def test_archive_tgz(tmp_path):
+    p = Project('arc') | Rust(); fs = mem(p)
+    path = p.archive(str(tmp_path / 'a.tgz'))
+    with tarfile.open(path) as t:
+        files = {i.name: t.extractfile(i).read() for i in t if i.isfile()}
+    assert files == fs.tree
+    with open(path, 'rb') as F: first = F.read()
+    with open(p.archive(path), 'rb') as F: assert F.read() == first
+
+def test_archive_missing(tmp_path):
+    path = str(tmp_path / 'a.zip')
+    with pytest.raises(FileNotFoundError):
+        (Project('arc') | Python()).archive(path, [str(tmp_path / 'no.jar')])
+    assert not os.path.exists(path)
+
+def test_archive_dedupe(tmp_path):
+    d = Dir('d') // (File('f') // 'first') // (Dir('e') // File('x')) \
+        // (File('f') // 'last') // (Dir('e') // File('y'))
+    path = str(tmp_path / 'd.zip'); z = Zip(path); d.sync(z); z.close()
+    with zipfile.ZipFile(path) as z:
+        assert z.namelist() == ['d/', 'd/f', 'd/e/', 'd/e/x', 'd/e/y']
+        assert z.read('d/f') == b'last\n'
+
+@pytest.mark.filterwarnings('error')
+def test_archive_dirs(tmp_path):
+    d = Dir('r') // (Dir('a/b') // File('x')) // (Dir('a/c') // File('y'))
+    path = str(tmp_path / 'r.zip'); z = Zip(path); d.sync(z); z.close()
+    with zipfile.ZipFile(path) as z:
+        assert z.namelist() == ['r/', 'r/a/', 'r/a/b/', 'r/a/b/x', 'r/a/c/', 'r/a/c/y']
+    path = str(tmp_path / 'r.tgz'); t = Tar(path); d.sync(t); t.close()
+    with tarfile.open(path) as t:
+        assert t.getnames() == ['r', 'r/a', 'r/a/b', 'r/a/b/x', 'r/a/c', 'r/a/c/y']